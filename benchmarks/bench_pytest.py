@@ -0,0 +1,36 @@
+"""
+The benchmarks of run.py for pytest-benchmark, which adds calibrated rounds, statistics and its own result storage:
+
+    python -m pytest benchmarks/bench_pytest.py --benchmark-autosave
+    python -m pytest benchmarks/bench_pytest.py --benchmark-compare
+
+Skipped unless pytest-benchmark is installed.
+"""
+from io import StringIO
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.corpora import CORPORA  # noqa: E402
+from benchmarks.run import OPERATIONS  # noqa: E402
+
+TEXTS = {}
+
+
+def text(corpus):
+    if corpus not in TEXTS:
+        TEXTS[corpus] = CORPORA[corpus]()
+    return TEXTS[corpus]
+
+
+@pytest.mark.parametrize("implementation,operation,function", OPERATIONS,
+                         ids=["{}-{}".format(implementation, operation) for implementation, operation, _ in OPERATIONS])
+@pytest.mark.parametrize("corpus", sorted(CORPORA))
+def test_throughput(benchmark, corpus, implementation, operation, function):
+    data = text(corpus)
+    if implementation == "json" and corpus == "deep_nesting":
+        pytest.skip("json does not support nesting this deep")
+    benchmark.group = "{}-{}".format(corpus, operation)
+    benchmark.extra_info["bytes"] = len(data.encode("utf-8"))
+    benchmark.pedantic(function, setup=lambda: ((StringIO(data),), {}), rounds=3)
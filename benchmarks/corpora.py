@@ -0,0 +1,55 @@
+"""
+Generated documents for the benchmarks.  Every corpus is built from a fixed seed, so runs on different commits parse
+exactly the same text.  scale multiplies the size of each corpus.
+"""
+import json
+import random
+
+
+def wide_objects(scale=1.0):
+    rng = random.Random(1)
+    keys = ["field_{}".format(i) for i in range(200)]
+    return json.dumps([{key: rng.choice((rng.randint(0, 1000), "value", True, None)) for key in keys}
+                       for _ in range(int(500 * scale))])
+
+
+def deep_nesting(scale=1.0):
+    depth = int(20000 * scale)
+    return "[" + '{"a": [' * depth + "1" + "]}" * depth + "]"
+
+
+def numbers(scale=1.0):
+    rng = random.Random(2)
+    return json.dumps([[rng.randint(-10 ** 9, 10 ** 9), rng.random() * 10 ** rng.randint(-5, 5), -rng.random()]
+                       for _ in range(int(100000 * scale))])
+
+
+def strings(scale=1.0):
+    rng = random.Random(3)
+    words = ["plain", "with \"quotes\"", "back\\slash", "tab\tand\nnewline", "path/to/file",
+             "a longer sentence of text"]
+    return json.dumps([" ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+                       for _ in range(int(100000 * scale))])
+
+
+def unicode_escapes(scale=1.0):
+    rng = random.Random(4)
+    characters = "éü中文Жλ\U0001f600\U0001f680"
+    return json.dumps(["".join(rng.choice(characters) for _ in range(rng.randint(1, 16))) for _ in
+                       range(int(100000 * scale))])
+
+
+def large_array(scale=1.0):
+    rng = random.Random(5)
+    return json.dumps([rng.choice((rng.randint(0, 10 ** 6), "item", None, True, {"id": 1}))
+                       for _ in range(int(1000000 * scale))])
+
+
+CORPORA = {
+    "wide_objects": wide_objects,
+    "deep_nesting": deep_nesting,
+    "numbers": numbers,
+    "strings": strings,
+    "unicode_escapes": unicode_escapes,
+    "large_array": large_array,
+}
@@ -0,0 +1,166 @@
+"""
+Benchmarks tokenize, parse and stream_array on the generated corpora, alongside the standard library's json for
+comparison, with tokenize run both on 64 KiB reads and with its default buffer_size.  Throughput, time per item
+(tokens for tokenize, elements for stream_array, documents for parse) and peak memory are reported, and the results
+can be saved as JSON and compared with those of an earlier run:
+
+    python benchmarks/run.py --output before.json
+    python benchmarks/run.py --output after.json --compare before.json
+
+Peak memory is measured with tracemalloc in a separate, untimed run.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from io import BytesIO, StringIO
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpora import CORPORA  # noqa: E402
+from naya.json import parse, stream_array, tokenize  # noqa: E402
+
+
+def count(iterable):
+    total = 0
+    for _ in iterable:
+        total += 1
+    return total
+
+
+def naya_tokenize(stream):
+    return count(tokenize(stream, 65536))
+
+
+def naya_tokenize_default(stream):
+    return count(tokenize(stream))
+
+
+def naya_parse(stream):
+    parse(stream)
+    return 1
+
+
+def naya_stream_array(stream):
+    return count(stream_array(tokenize(stream, 65536)))
+
+
+def stdlib_parse(stream):
+    json.load(stream)
+    return 1
+
+
+OPERATIONS = [
+    ("naya", "tokenize", naya_tokenize),
+    ("naya", "tokenize_default", naya_tokenize_default),
+    ("naya", "parse", naya_parse),
+    ("naya", "stream_array", naya_stream_array),
+    ("json", "parse", stdlib_parse),
+]
+OPERATION_NAMES = list(dict.fromkeys(operation for _, operation, _ in OPERATIONS))
+
+
+def measure(function, make_stream, repeat):
+    best = None
+    for _ in range(repeat):
+        stream = make_stream()
+        start = time.perf_counter()
+        items = function(stream)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    try:
+        function(make_stream())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return items, best, peak
+
+
+def run(corpora, operations, scale, repeat, binary):
+    results = []
+    for corpus in corpora:
+        text = CORPORA[corpus](scale)
+        data = text.encode("utf-8")
+        make_stream = (lambda: BytesIO(data)) if binary else (lambda: StringIO(text))
+        for implementation, operation, function in OPERATIONS:
+            if operation not in operations:
+                continue
+            result = {"corpus": corpus, "implementation": implementation, "operation": operation, "bytes": len(data)}
+            try:
+                items, elapsed, peak = measure(function, make_stream, repeat)
+            except (ValueError, RecursionError) as e:
+                result["error"] = str(e)
+            else:
+                result.update(items=items, seconds=elapsed, mb_per_s=len(data) / elapsed / 1e6,
+                              us_per_item=elapsed / items * 1e6, peak_memory=peak)
+            results.append(result)
+            report(result)
+    return results
+
+
+def key(result):
+    return result["corpus"], result["implementation"], result["operation"]
+
+
+def report(result, baseline=None):
+    name = "{:<16} {:<5} {:<16}".format(*key(result))
+    if "error" in result:
+        print("{} failed: {}".format(name, result["error"]))
+        return
+    line = "{} {:>9.2f} MB/s {:>12.3f} us/item {:>10.1f} MB peak".format(
+        name, result["mb_per_s"], result["us_per_item"], result["peak_memory"] / 1e6)
+    if baseline is not None and "mb_per_s" in baseline:
+        line += "  {:+.1f}%".format((result["mb_per_s"] / baseline["mb_per_s"] - 1) * 100)
+    print(line)
+
+
+def revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, check=True, universal_newlines=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", action="append", choices=sorted(CORPORA), help="corpus to run (default: all)")
+    parser.add_argument("--operation", action="append", choices=OPERATION_NAMES,
+                        help="operation to run (default: all)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the size of every corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark, the best is kept")
+    parser.add_argument("--binary", action="store_true", help="read the corpora from bytes rather than str")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="compare the throughput with the results saved in this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.corpus or list(CORPORA), args.operation or OPERATION_NAMES,
+                  args.scale, args.repeat, args.binary)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = {key(result): result for result in json.load(file)["results"]}
+        print("\nCompared with {}:".format(args.compare))
+        for result in results:
+            report(result, baseline.get(key(result)))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "revision": revision(),
+                "date": datetime.datetime.now().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "scale": args.scale,
+                "binary": args.binary,
+                "results": results,
+            }, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
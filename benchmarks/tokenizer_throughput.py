@@ -0,0 +1,50 @@
+"""
+Measures the throughput of tokenize on token heavy documents.
+
+    python benchmarks/tokenizer_throughput.py
+"""
+import json
+import os
+import random
+import sys
+import time
+from io import BytesIO, StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from naya.json import tokenize  # noqa: E402
+
+
+def documents():
+    rng = random.Random(1)
+    yield "integers", json.dumps([rng.randint(-10 ** 6, 10 ** 6) for _ in range(200000)])
+    yield "floats", json.dumps([rng.random() * 1000 for _ in range(100000)])
+    yield "records", json.dumps([{"id": i, "name": "user{}".format(i), "active": i % 2 == 0, "score": i * 1.5,
+                                  "tags": ["a", "b"], "parent": None} for i in range(20000)])
+    yield "operators", json.dumps([[[], {}, [[]]] for _ in range(50000)])
+
+
+def measure(make_stream, buffer_size, repeat=3):
+    best = None
+    for _ in range(repeat):
+        stream = make_stream()
+        start = time.perf_counter()
+        count = sum(1 for _ in tokenize(stream, buffer_size))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count, best
+
+
+def main():
+    print("{:<10} {:>6} {:>8} {:>10} {:>14}".format("document", "input", "buffer", "MB/s", "tokens/s"))
+    for name, text in documents():
+        data = text.encode("utf-8")
+        for kind, make_stream in (("text", lambda: StringIO(text)), ("binary", lambda: BytesIO(data))):
+            for buffer_size in (65536, None):
+                count, elapsed = measure(make_stream, buffer_size)
+                print("{:<10} {:>6} {:>8} {:>10.2f} {:>14,.0f}".format(
+                    name, kind, buffer_size or "default", len(data) / elapsed / 1e6, count / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,13 @@
-from naya.json import parse, parse_string, stream_array, tokenize
-__all__ = ["parse", "parse_string", "stream_array", "tokenize"]
\ No newline at end of file
+from naya.aio import async_stream_array, async_tokenize
+from naya.columns import stream_array_columns
+from naya.json import Checkpoint, IncrementalParser, KeyCache, Limits, ParseStats, RawNumber, parse, parse_file, \
+    parse_string, stream_array, stream_array_file, stream_documents, stream_path, tokenize, validate
+from naya.lazy import parse_lazy
+from naya.parallel import parse_parallel, stream_array_parallel, stream_documents_parallel
+from naya.transform import DROP, Rename, transform
+from naya.writer import StreamArrayWriter, dump
+__all__ = ["Checkpoint", "DROP", "IncrementalParser", "KeyCache", "Limits", "ParseStats", "RawNumber", "Rename",
+           "StreamArrayWriter", "async_stream_array", "async_tokenize", "dump", "parse", "parse_file", "parse_lazy",
+           "parse_parallel", "parse_string", "stream_array", "stream_array_columns", "stream_array_file",
+           "stream_array_parallel", "stream_documents", "stream_documents_parallel", "stream_path", "tokenize",
+           "transform", "validate"]
\ No newline at end of file
@@ -0,0 +1,33 @@
+from naya.json import DEFAULT_BUFFER_SIZE, _INCOMPLETE, _ArrayElements, _Tokenizer
+
+
+async def async_tokenize(reader, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Tokenizes the input of an asyncio.StreamReader, or any other object with a coroutine read(n) method.  The tokenizer
+    keeps its state between reads, so tokens are yielded as soon as they are complete without ever blocking the loop.
+    """
+    tokenizer = None
+    chunk = await reader.read(buffer_size)
+    while chunk:
+        if tokenizer is None:
+            tokenizer = _Tokenizer(not isinstance(chunk, str))
+        for token in tokenizer.feed(chunk):
+            yield token
+        chunk = await reader.read(buffer_size)
+    if tokenizer is None:
+        tokenizer = _Tokenizer()
+    for token in tokenizer.feed(tokenizer.syntax.empty, True):
+        yield token
+
+
+async def async_stream_array(reader, buffer_size=DEFAULT_BUFFER_SIZE, key_cache=None):
+    """
+    The asynchronous counterpart of stream_array.  Each element of the top level array is yielded as soon as it has
+    been read in full.
+    """
+    elements = _ArrayElements(key_cache)
+    async for token in async_tokenize(reader, buffer_size):
+        value = elements.push(token)
+        if value is not _INCOMPLETE:
+            yield value
+    elements.close()
@@ -0,0 +1,168 @@
+from array import array
+
+from naya.json import DEFAULT_BUFFER_SIZE, TOKEN_TYPE, _build, _next_token, _skip, _token_stream
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_FLOATS = "fd"
+_INTEGERS = "bBhHiIlLqQ"
+
+
+class _Column:
+    """
+    The values of one field of the records, collected in an array.array for numbers (by typecode) and booleans, or in
+    a list for str and object fields.
+    """
+
+    def __init__(self, name, kind):
+        if kind not in (bool, str, object) and (not isinstance(kind, str) or kind not in _FLOATS + _INTEGERS):
+            raise ValueError("Column '{}' must be an array typecode, bool, str or object.  Got {!r}".format(name, kind))
+        self.name = name
+        self.kind = kind
+        self.floats = isinstance(kind, str) and kind in _FLOATS
+        self.values = self.empty()
+
+    def empty(self):
+        if self.kind is bool:
+            return array("b")
+        if self.kind is str or self.kind is object:
+            return []
+        return array(self.kind)
+
+    def convert(self, token, token_stream, record):
+        token_type, value = token
+        kind = self.kind
+        if kind is object:
+            return _build(token_stream, token, None)
+        if token_type == TOKEN_TYPE.NULL:
+            if kind is str:
+                return None
+            if self.floats:
+                return float("nan")
+        elif kind is bool:
+            if token_type == TOKEN_TYPE.BOOLEAN:
+                return value
+        elif kind is str:
+            if token_type == TOKEN_TYPE.STRING:
+                return value
+        elif token_type == TOKEN_TYPE.NUMBER and (self.floats or isinstance(value, int)):
+            return value
+        raise ValueError("Record {}: '{}' must be {}.  Got '{}'".format(record, self.name, self.description(), value))
+
+    def description(self):
+        if self.kind is bool:
+            return "a boolean"
+        if self.kind is str:
+            return "a string or null"
+        if self.floats:
+            return "a number or null"
+        return "an integer"
+
+    def missing(self, record):
+        if self.kind is str or self.kind is object:
+            return None
+        if self.floats:
+            return float("nan")
+        raise ValueError("Record {} has no value for '{}'".format(record, self.name))
+
+    def append(self, value, record):
+        try:
+            self.values.append(value)
+        except OverflowError as e:
+            raise ValueError("Record {}: '{}' is out of range for typecode '{}'.  Got '{}'".format(
+                record, self.name, self.kind, value)) from e
+
+    def replace(self, value, record):
+        self.values.pop()
+        self.append(value, record)
+
+    def take(self, as_numpy):
+        values, self.values = self.values, self.empty()
+        if not as_numpy:
+            return values
+        if self.kind is bool:
+            return numpy.frombuffer(values, dtype=numpy.int8).astype(bool)
+        if isinstance(values, list):
+            result = numpy.empty(len(values), dtype=object)
+            result[:] = values
+            return result
+        return numpy.frombuffer(values, dtype=self.kind).copy()
+
+
+def stream_array_columns(token_stream, schema, batch_size=DEFAULT_BUFFER_SIZE, as_numpy=False):
+    """
+    Reads a top level array of objects into columns, without building a dict for any of them.  schema maps each field
+    to collect to the type of its column: an array.array typecode for numbers, or bool, str or object.  Fields not in
+    the schema are skipped.  A dict of columns is yielded for every batch_size records, holding array.arrays (or lists
+    for str and object), or NumPy arrays if as_numpy is True.
+
+    Null and missing values become NaN in float columns and None in str and object ones.  Anywhere else they are an
+    error, as are values of the wrong type.
+    """
+    if as_numpy and numpy is None:
+        raise ImportError("as_numpy requires NumPy to be installed")
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    columns = {name: _Column(name, kind) for name, kind in schema.items()}
+    token_stream = _token_stream(token_stream)
+    return _stream_columns(token_stream, columns, batch_size, as_numpy)
+
+
+def _stream_columns(token_stream, columns, batch_size, as_numpy):
+    token_type, value = _next_token(token_stream)
+    if token_type != TOKEN_TYPE.OPERATOR or value != "[":
+        raise ValueError("Array must start with '['.  Got '{}'".format(value))
+    token_type, value = _next_token(token_stream)
+    record = 0
+    rows = 0
+    if token_type != TOKEN_TYPE.OPERATOR or value != "]":
+        while True:
+            if token_type != TOKEN_TYPE.OPERATOR or value != "{":
+                raise ValueError("Record {} must be an object.  Got '{}'".format(record, value))
+            _read_record(token_stream, columns, record, rows)
+            record += 1
+            rows += 1
+            if rows == batch_size:
+                yield {name: column.take(as_numpy) for name, column in columns.items()}
+                rows = 0
+            token_type, value = _next_token(token_stream)
+            if token_type == TOKEN_TYPE.OPERATOR and value == "]":
+                break
+            if token_type != TOKEN_TYPE.OPERATOR or value != ",":
+                raise ValueError("Array entries must be followed by ',' or ']'.  Got '{}'".format(value))
+            token_type, value = _next_token(token_stream)
+    if rows:
+        yield {name: column.take(as_numpy) for name, column in columns.items()}
+    for _ in token_stream:
+        raise ValueError("Additional string after end of JSON")
+
+
+def _read_record(token_stream, columns, record, rows):
+    token_type, value = _next_token(token_stream)
+    if token_type != TOKEN_TYPE.OPERATOR or value != "}":
+        while True:
+            if token_type != TOKEN_TYPE.STRING:
+                raise ValueError("Object keys must be strings.  Got '{}'".format(value))
+            column = columns.get(value)
+            token_type, value = _next_token(token_stream)
+            if token_type != TOKEN_TYPE.OPERATOR or value != ":":
+                raise ValueError("Object keys must be separated from values by a single ':'.  Got '{}'".format(value))
+            token = _next_token(token_stream)
+            if column is None:
+                _skip(token_stream, token)
+            elif len(column.values) > rows:
+                column.replace(column.convert(token, token_stream, record), record)
+            else:
+                column.append(column.convert(token, token_stream, record), record)
+            token_type, value = _next_token(token_stream)
+            if token_type == TOKEN_TYPE.OPERATOR and value == "}":
+                break
+            if token_type != TOKEN_TYPE.OPERATOR or value != ",":
+                raise ValueError("Object key value pairs should be followed by ',' or '}}'.  Got '{}'".format(value))
+            token_type, value = _next_token(token_stream)
+    for column in columns.values():
+        if len(column.values) == rows:
+            column.append(column.missing(record), record)
@@ -1,4 +1,13 @@
-from io import StringIO
+import codecs
+import mmap
+import os
+import queue
+import re
+import stat
+import threading
+import time
+from contextlib import contextmanager
+from io import FileIO, RawIOBase, StringIO
 
 
 class TOKEN_TYPE:
@@ -9,570 +18,2006 @@ class TOKEN_TYPE:
     NULL = 4
 
 
-class __TOKENIZER_STATE:
-    WHITESPACE = 0
-    INTEGER_0 = 1
-    INTEGER_SIGN = 2
-    INTEGER = 3
-    INTEGER_EXP = 4
-    INTEGER_EXP_0 = 5
-    FLOATING_POINT_0 = 6
-    FLOATING_POINT = 8
-    STRING = 9
-    STRING_ESCAPE = 10
-    STRING_END = 11
-    TRUE_1 = 12
-    TRUE_2 = 13
-    TRUE_3 = 14
-    FALSE_1 = 15
-    FALSE_2 = 16
-    FALSE_3 = 17
-    FALSE_4 = 18
-    NULL_1 = 19
-    NULL_2 = 20
-    NULL_3 = 21
-    UNICODE_1 = 22
-    UNICODE_2 = 23
-    UNICODE_3 = 24
-    UNICODE_4 = 25
-
-
-def tokenize(stream):
-    def is_delimiter(char):
-        return char.isspace() or char in "{}[]:,"
-
-    token = []
-    charcode = 0
-    completed = False
-    now_token = ""
-
-    def process_char(char, charcode):
-        nonlocal token, completed, now_token
-        advance = True
-        add_char = False
-        next_state = state
-        if state == __TOKENIZER_STATE.WHITESPACE:
-            if char == "{":
-                completed = True
-                now_token = (TOKEN_TYPE.OPERATOR, "{")
-            elif char == "}":
-                completed = True
-                now_token = (TOKEN_TYPE.OPERATOR, "}")
-            elif char == "[":
-                completed = True
-                now_token = (TOKEN_TYPE.OPERATOR, "[")
-            elif char == "]":
-                completed = True
-                now_token = (TOKEN_TYPE.OPERATOR, "]")
-            elif char == ",":
-                completed = True
-                now_token = (TOKEN_TYPE.OPERATOR, ",")
-            elif char == ":":
-                completed = True
-                now_token = (TOKEN_TYPE.OPERATOR, ":")
-            elif char == "\"":
-                next_state = __TOKENIZER_STATE.STRING
-            elif char in "123456789":
-                next_state = __TOKENIZER_STATE.INTEGER
-                add_char = True
-            elif char == "0":
-                next_state = __TOKENIZER_STATE.INTEGER_0
-                add_char = True
-            elif char == "-":
-                next_state = __TOKENIZER_STATE.INTEGER_SIGN
-                add_char = True
-            elif char == "f":
-                next_state = __TOKENIZER_STATE.FALSE_1
-            elif char == "t":
-                next_state = __TOKENIZER_STATE.TRUE_1
-            elif char == "n":
-                next_state = __TOKENIZER_STATE.NULL_1
-            elif not char.isspace():
-                raise ValueError("Invalid JSON character: '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.INTEGER:
-            if char in "0123456789":
-                add_char = True
-            elif char == ".":
-                next_state = __TOKENIZER_STATE.FLOATING_POINT_0
-                add_char = True
-            elif char == "e" or char == 'E':
-                next_state = __TOKENIZER_STATE.INTEGER_EXP_0
-                add_char = True
-            elif is_delimiter(char):
-                next_state = __TOKENIZER_STATE.WHITESPACE
-                completed = True
-                now_token = (TOKEN_TYPE.NUMBER, int("".join(token)))
-                advance = False
-            else:
-                raise ValueError("A number must contain only digits.  Got '{}'".format(char))
-        elif state == __TOKENIZER_STATE.INTEGER_0:
+DEFAULT_BUFFER_SIZE = 65536
+
+
+class _Syntax:
+    """
+    The patterns and lookup tables used by the tokenizer, built either for text or for binary (UTF-8) input.  Binary
+    input is scanned as raw bytes and only the contents of strings are ever decoded.
+    """
+
+    def __init__(self, binary, limits=None, structure=False, counted=True):
+        def encode(text):
+            return text.encode("ascii") if binary else text
+
+        self.binary = binary
+        self.empty = encode("")
+        # The first four alternatives match complete tokens, followed by a delimiter where one is needed.  Anything
+        # they do not match (escapes, tokens cut off by the end of the input and errors) is left to the slow path,
+        # which is chosen by the remaining alternatives.  Under limits, strings and numbers past the maximum length
+        # are left to the slow path too, and so are brackets and commas when depth or members are counted there (unless
+        # counted is False, for callers that count them themselves), or when structure asks for them to be.
+        operators, string, number = r"[{}\[\]:,]", r'"([^"\\]*)"', ""
+        if structure:
+            operators = ":"
+        if limits is not None:
+            if counted and (limits.max_depth is not None or limits.max_members is not None):
+                operators = ":"
+            if limits.max_string_length is not None:
+                string = r'"([^"\\]{0,%d})"' % limits.max_string_length
+            if limits.max_number_length is not None:
+                number = r"(?![-+.eE0-9]{%d})" % (limits.max_number_length + 1)
+        self.token = re.compile(encode(
+            r'\s*(?:(' + operators + r'|true|false|null)'
+            r'|' + string + r'(?=[\s{}\[\]:,])'
+            r'|' + number + r'(-?(?:0|[1-9][0-9]*))(?=[\s{}\[\]:,])'
+            r'|' + number + r'(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?)(?=[\s{}\[\]:,])'
+            r'|(")|([-0-9])|([tfn])|(.))?'), re.DOTALL)
+        self.delimiter = re.compile(encode(r"[\s{}\[\]:,]"))
+        self.number = re.compile(encode(r"-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?"))
+        self.number_run = re.compile(encode(r"[-+.eE0-9]*"))
+        self.string_body = re.compile(encode(r'[^"\\]*'))
+        self.escaped_string = re.compile(encode(r'[^"\\]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\]*)*"'))
+        self.low_surrogate = re.compile(encode(r"\\u([dD][c-fC-F][0-9a-fA-F]{2})"))
+        self.partial_low_surrogate = re.compile(encode(r"(?:\\(?:u(?:[dD](?:[c-fC-F][0-9a-fA-F]{0,2})?)?)?)?"))
+        self.hex = re.compile(encode(r"[0-9a-fA-F]{0,4}"))
+        self.literal = re.compile(encode(r"true|false|null|t(?:ru?)?|f(?:a(?:ls?)?)?|n(?:ul?)?"))
+        self.literals = {
+            encode("true"): (TOKEN_TYPE.BOOLEAN, True),
+            encode("false"): (TOKEN_TYPE.BOOLEAN, False),
+            encode("null"): (TOKEN_TYPE.NULL, None),
+        }
+        self.constants = dict(self.literals)
+        self.constants.update({encode(char): (TOKEN_TYPE.OPERATOR, char) for char in "{}[]:,"})
+        escapes = {"\\": "\\", "\"": "\"", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+        self.escapes = {encode(key): encode(value) for key, value in escapes.items()}
+        self.quote = encode("\"")
+        self.unicode_escape = encode("u")
+
+    def decode(self, value):
+        if self.binary:
+            return bytes(value).decode("utf-8", "surrogatepass")
+        return value
+
+    def encode_char(self, char):
+        if self.binary:
+            return char.encode("utf-8", "surrogatepass")
+        return char
+
+    def char(self, data, pos):
+        char = data[pos:pos + 1]
+        if self.binary:
+            return bytes(char).decode("utf-8", "replace")
+        return char
+
+
+_TEXT = _Syntax(False)
+_BINARY = _Syntax(True)
+_STRUCTURE = {False: _Syntax(False, structure=True), True: _Syntax(True, structure=True)}
+
+_ESCAPE = re.compile(r'\\(?:u([dD][89abAB][0-9a-fA-F]{2})\\u([dD][c-fC-F][0-9a-fA-F]{2})|u([0-9a-fA-F]{4})|(.))')
+_ESCAPES = {"\\": "\\", "\"": "\"", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def _unescape_match(match):
+    high, low, code, char = match.groups()
+    if char is not None:
+        return _ESCAPES[char]
+    if code is not None:
+        return chr(int(code, 16))
+    return chr(0x10000 + ((int(high, 16) - 0xd800) << 10) + int(low, 16) - 0xdc00)
+
+
+def _unescape(value):
+    """
+    Decodes every escape sequence of an already validated string body in one pass, merging surrogate pairs.
+    """
+    return _ESCAPE.sub(_unescape_match, value)
+
+
+class RawNumber(str):
+    """
+    A number kept as it was written in the input.  Passed as both parse_int and parse_float, it makes every number come
+    out unconverted, so that fields that are never used cost no conversion, and the rest can be converted later with
+    int, float or Decimal, exactly.
+    """
+
+    __slots__ = ()
+
+
+def _number_parsers(binary, numbers):
+    """
+    The functions the tokenizer converts integers and floats with: int and float unless numbers gives (parse_int,
+    parse_float) replacements.  Replacements are always called with str, also for binary input.
+    """
+    if numbers is None:
+        return int, float
+    parsers = []
+    for parser, default in zip(numbers, (int, float)):
+        if parser is None:
+            parser = default
+        elif binary:
+            parser = (lambda convert: lambda text: convert(text.decode("ascii")))(parser)
+        parsers.append(parser)
+    return parsers
+
+
+def _numbers(parse_int, parse_float):
+    if parse_int is None and parse_float is None:
+        return None
+    return parse_int, parse_float
+
+
+def _is_buffer(source):
+    return isinstance(source, (bytes, bytearray, memoryview, mmap.mmap))
+
+
+class _Tokenizer:
+    """
+    Incremental tokenizer.  Input is handed over in chunks of any size through feed, and every token that is complete
+    within the input seen so far is yielded straight away.  Anything that may still be continued by the next chunk (a
+    number, a literal or an escape sequence) is carried over, and strings spanning several chunks are accumulated
+    piece by piece rather than rescanned.
+    """
+
+    def __init__(self, binary=False, limits=None, numbers=None):
+        self.syntax = _BINARY if binary else _TEXT
+        self.parse_int, self.parse_float = _number_parsers(binary, numbers)
+        self.index = 0
+        self.pending = self.syntax.empty
+        self.parts = None
+        self.quote_index = 0
+        self.string_end = False
+        self.slow_paths = (None, None, None, None, None, self.string_start, self.number_start, self.literal_start,
+                           self.invalid)
+        self.limits = limits
+        if limits is not None:
+            self.syntax = limits.syntax(binary)
+            self.members = []
+            self.string_index = 0
+            self.string = self.limited_string
+            self.slow_paths = (None, None, None, None, None, self.limited_string_start, self.limited_number_start,
+                               self.literal_start, self.structure)
+
+    def error(self, message, pos):
+        return ValueError("{} at index {}".format(message, self.index + pos))
+
+    def feed(self, data, final=False):
+        syntax = self.syntax
+        if self.pending:
+            data = self.pending + data
+        length = len(data)
+        if self.limits is not None:
+            self.check_size(length)
+        pos = 0
+        if self.parts is not None:
+            token, pos = self.string(data, 0, final)
+            if token is None:
+                self.carry(data, pos)
+                return
+            yield token
+        if self.string_end and pos < length:
+            self.string_end = False
+            if not syntax.delimiter.match(data, pos):
+                raise self.error("Expected whitespace or an operator after string.  Got '{}'".format(
+                    syntax.char(data, pos)), pos)
+        match_token = syntax.token.match
+        constants = syntax.constants
+        binary = syntax.binary
+        slow_paths = self.slow_paths
+        parse_int = self.parse_int
+        parse_float = self.parse_float
+        try:
+            while True:
+                match = match_token(data, pos)
+                kind = match.lastindex
+                if kind == 1:
+                    yield constants[match.group(1)]
+                elif kind == 2:
+                    value = match.group(2)
+                    yield TOKEN_TYPE.STRING, value.decode("utf-8", "surrogatepass") if binary else value
+                elif kind == 3:
+                    yield TOKEN_TYPE.NUMBER, parse_int(match.group(3))
+                elif kind == 4:
+                    yield TOKEN_TYPE.NUMBER, parse_float(match.group(4))
+                elif kind is None:
+                    pos = length
+                    break
+                else:
+                    token, pos = slow_paths[kind](data, match.start(kind), final)
+                    if token is None:
+                        break
+                    yield token
+                    continue
+                pos = match.end()
+        except UnicodeDecodeError as e:
+            raise self.error("Invalid UTF-8", match.start(2) + e.start) from None
+        self.carry(data, pos)
+
+    def carry(self, data, pos):
+        pending = data[pos:]
+        self.pending = pending if isinstance(pending, (str, bytes)) else bytes(pending)
+        self.index += pos
+
+    def string_start(self, data, pos, final):
+        syntax = self.syntax
+        match = syntax.escaped_string.match(data, pos + 1)
+        if match:
+            end = match.end()
+            self.string_ended(data, end, final)
+            return (TOKEN_TYPE.STRING, _unescape(self.decode(data[pos + 1:end - 1], pos + 1))), end
+        self.parts = []
+        self.quote_index = self.index + pos
+        return self.string(data, pos + 1, final)
+
+    def decode(self, value, pos):
+        """
+        Decodes the contents of a string, which start at pos, with the index of any invalid UTF-8 in the error.  For a
+        string accumulated from several chunks, the index is counted from its opening quote as if it had no escapes.
+        """
+        try:
+            return self.syntax.decode(value)
+        except UnicodeDecodeError as e:
+            raise self.error("Invalid UTF-8", pos + e.start) from None
+
+    def string_ended(self, data, end, final):
+        if end == len(data):
+            self.string_end = not final
+        elif not self.syntax.delimiter.match(data, end):
+            raise self.error("Expected whitespace or an operator after string.  Got '{}'".format(
+                self.syntax.char(data, end)), end)
+
+    def number_start(self, data, pos, final):
+        run_end = self.syntax.number_run.match(data, pos).end()
+        if run_end == len(data) and not final:
+            return None, pos
+        return self.number(data, pos, run_end), run_end
+
+    def literal_start(self, data, pos, final):
+        syntax = self.syntax
+        literal = syntax.literal.match(data, pos)
+        end = literal.end()
+        if literal.group() in syntax.literals:
+            return syntax.literals[literal.group()], end
+        if end < len(data):
+            raise self.error("Invalid JSON character: '{0}'".format(syntax.char(data, end)), end)
+        if final:
+            raise self.error("Unexpected end of input", end)
+        return None, pos
+
+    def invalid(self, data, pos, final):
+        raise self.error("Invalid JSON character: '{0}'".format(self.syntax.char(data, pos)), pos)
+
+    def number(self, data, pos, run_end):
+        syntax = self.syntax
+        match = syntax.number.match(data, pos)
+        if not match:
+            raise self.error("A - must be followed by a digit.  Got '{0}'".format(syntax.char(data, pos + 1)), pos + 1)
+        end = match.end()
+        if end != run_end:
+            char = syntax.char(data, end)
+            if match.group(1) is None and match.group(2) is None and syntax.char(data, end - 1) == "0" and \
+                    char.isdigit():
+                raise self.error("A 0 must be followed by a '.' or a 'e'.  Got '{0}'".format(char), end)
             if char == ".":
-                next_state = __TOKENIZER_STATE.FLOATING_POINT_0
-                add_char = True
-            elif char == "e" or char == 'E':
-                next_state = __TOKENIZER_STATE.INTEGER_EXP_0
-                add_char = True
-            elif is_delimiter(char):
-                next_state = __TOKENIZER_STATE.WHITESPACE
-                completed = True
-                now_token = (TOKEN_TYPE.NUMBER, 0)
-                advance = False
-            else:
-                raise ValueError("A 0 must be followed by a '.' or a 'e'.  Got '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.INTEGER_SIGN:
-            if char == "0":
-                next_state = __TOKENIZER_STATE.INTEGER_0
-                add_char = True
-            elif char in "123456789":
-                next_state = __TOKENIZER_STATE.INTEGER
-                add_char = True
-            else:
-                raise ValueError("A - must be followed by a digit.  Got '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.INTEGER_EXP_0:
-            if char == "+" or char == "-" or char in "0123456789":
-                next_state = __TOKENIZER_STATE.INTEGER_EXP
-                add_char = True
-            else:
-                raise ValueError("An e in a number must be followed by a '+', '-' or digit.  Got '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.INTEGER_EXP:
-            if char in "0123456789":
-                add_char = True
-            elif is_delimiter(char):
-                completed = True
-                now_token = (TOKEN_TYPE.NUMBER, float("".join(token)))
-                next_state = __TOKENIZER_STATE.WHITESPACE
-                advance = False
-            else:
-                raise ValueError("A number exponent must consist only of digits.  Got '{}'".format(char))
-        elif state == __TOKENIZER_STATE.FLOATING_POINT:
-            if char in "0123456789":
-                add_char = True
-            elif char == "e" or char == "E":
-                next_state = __TOKENIZER_STATE.INTEGER_EXP_0
-                add_char = True
-            elif is_delimiter(char):
-                completed = True
-                now_token = (TOKEN_TYPE.NUMBER, float("".join(token)))
-                next_state = __TOKENIZER_STATE.WHITESPACE
-                advance = False
-            else:
-                raise ValueError("A number must include only digits")
-        elif state == __TOKENIZER_STATE.FLOATING_POINT_0:
-            if char in "0123456789":
-                next_state = __TOKENIZER_STATE.FLOATING_POINT
-                add_char = True
-            else:
-                raise ValueError("A number with a decimal point must be followed by a fractional part")
-        elif state == __TOKENIZER_STATE.FALSE_1:
-            if char == "a":
-                next_state = __TOKENIZER_STATE.FALSE_2
-            else:
-                raise ValueError("Invalid JSON character: '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.FALSE_2:
-            if char == "l":
-                next_state = __TOKENIZER_STATE.FALSE_3
-            else:
-                raise ValueError("Invalid JSON character: '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.FALSE_3:
-            if char == "s":
-                next_state = __TOKENIZER_STATE.FALSE_4
-            else:
-                raise ValueError("Invalid JSON character: '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.FALSE_4:
-            if char == "e":
-                next_state = __TOKENIZER_STATE.WHITESPACE
-                completed = True
-                now_token = (TOKEN_TYPE.BOOLEAN, False)
-            else:
-                raise ValueError("Invalid JSON character: '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.TRUE_1:
-            if char == "r":
-                next_state = __TOKENIZER_STATE.TRUE_2
-            else:
-                raise ValueError("Invalid JSON character: '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.TRUE_2:
-            if char == "u":
-                next_state = __TOKENIZER_STATE.TRUE_3
-            else:
-                raise ValueError("Invalid JSON character: '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.TRUE_3:
-            if char == "e":
-                next_state = __TOKENIZER_STATE.WHITESPACE
-                completed = True
-                now_token = (TOKEN_TYPE.BOOLEAN, True)
-            else:
-                raise ValueError("Invalid JSON character: '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.NULL_1:
-            if char == "u":
-                next_state = __TOKENIZER_STATE.NULL_2
-            else:
-                raise ValueError("Invalid JSON character: '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.NULL_2:
-            if char == "l":
-                next_state = __TOKENIZER_STATE.NULL_3
-            else:
-                raise ValueError("Invalid JSON character: '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.NULL_3:
-            if char == "l":
-                next_state = __TOKENIZER_STATE.WHITESPACE
-                completed = True
-                now_token = (TOKEN_TYPE.NULL, None)
-            else:
-                raise ValueError("Invalid JSON character: '{0}'".format(char))
-        elif state == __TOKENIZER_STATE.STRING:
-            if char == "\"":
-                completed = True
-                now_token = (TOKEN_TYPE.STRING, "".join(token))
-                next_state = __TOKENIZER_STATE.STRING_END
-            elif char == "\\":
-                next_state = __TOKENIZER_STATE.STRING_ESCAPE
-            else:
-                add_char = True
-        elif state == __TOKENIZER_STATE.STRING_END:
-            if is_delimiter(char):
-                advance = False
-                next_state = __TOKENIZER_STATE.WHITESPACE
-            else:
-                raise ValueError("Expected whitespace or an operator after strin.  Got '{}'".format(char))
-        elif state == __TOKENIZER_STATE.STRING_ESCAPE:
-            next_state = __TOKENIZER_STATE.STRING
-            if char == "\\" or char == "\"":
-                add_char = True
-            elif char == "b":
-                char = "\b"
-                add_char = True
-            elif char == "f":
-                char = "\f"
-                add_char = True
-            elif char == "n":
-                char = "\n"
-                add_char = True
-            elif char == "t":
-                char = "\t"
-                add_char = True
-            elif char == "r":
-                char = "\r"
-                add_char = True
-            elif char == "/":
-                char = "/"
-                add_char = True
-            elif char == "u":
-                next_state = __TOKENIZER_STATE.UNICODE_1
-                charcode = 0
-            else:
-                raise ValueError("Invalid string escape: {}".format(char))
-        elif state == __TOKENIZER_STATE.UNICODE_1:
-            if char in "0123456789":
-                charcode = (ord(char) - 48) * 4096
-            elif char in "abcdef":
-                charcode = (ord(char) - 87) * 4096
-            elif char in "ABCDEF":
-                charcode = (ord(char) - 55) * 4096
-            else:
-                raise ValueError("Invalid character code: {}".format(char))
-            next_state = __TOKENIZER_STATE.UNICODE_2
-            char = ""
-        elif state == __TOKENIZER_STATE.UNICODE_2:
-            if char in "0123456789":
-                charcode += (ord(char) - 48) * 256
-            elif char in "abcdef":
-                charcode += (ord(char) - 87) * 256
-            elif char in "ABCDEF":
-                charcode += (ord(char) - 55) * 256
-            else:
-                raise ValueError("Invalid character code: {}".format(char))
-            next_state = __TOKENIZER_STATE.UNICODE_3
-            char = ""
-        elif state == __TOKENIZER_STATE.UNICODE_3:
-            if char in "0123456789":
-                charcode += (ord(char) - 48) * 16
-            elif char in "abcdef":
-                charcode += (ord(char) - 87) * 16
-            elif char in "ABCDEF":
-                charcode += (ord(char) - 55) * 16
+                raise self.error("A number with a decimal point must be followed by a fractional part", end + 1)
+            if char in "eE":
+                raise self.error("An e in a number must be followed by a '+', '-' or digit", end + 1)
+            raise self.error("A number must contain only digits.  Got '{}'".format(char), end)
+        if run_end < len(data) and not syntax.delimiter.match(data, run_end):
+            raise self.error("A number must contain only digits.  Got '{}'".format(syntax.char(data, run_end)),
+                             run_end)
+        if match.group(1) is None and match.group(2) is None:
+            return TOKEN_TYPE.NUMBER, self.parse_int(match.group())
+        return TOKEN_TYPE.NUMBER, self.parse_float(match.group())
+
+    def check_size(self, length):
+        max_bytes = self.limits.max_bytes
+        if max_bytes is not None and self.index + length > max_bytes:
+            raise self.error("Input is longer than the limit of {}".format(max_bytes), max_bytes - self.index)
+
+    def limited_string_start(self, data, pos, final):
+        self.string_index = self.index + pos + 1
+        token, end = self.string_start(data, pos, final)
+        max_length = self.limits.max_string_length
+        if token is not None and max_length is not None and end - pos - 2 > max_length:
+            raise self.error("String is longer than the limit of {}".format(max_length), pos + 1)
+        return token, end
+
+    def limited_string(self, data, pos, final):
+        token, end = _Tokenizer.string(self, data, pos, final)
+        max_length = self.limits.max_string_length
+        if max_length is not None and self.index + end - self.string_index - (token is not None) > max_length:
+            raise self.error("String is longer than the limit of {}".format(max_length),
+                             self.string_index - self.index)
+        return token, end
+
+    def limited_number_start(self, data, pos, final):
+        max_length = self.limits.max_number_length
+        if max_length is not None and self.syntax.number_run.match(data, pos).end() - pos > max_length:
+            raise self.error("Number is longer than the limit of {}".format(max_length), pos)
+        return self.number_start(data, pos, final)
+
+    def structure(self, data, pos, final):
+        char = self.syntax.char(data, pos)
+        if char == "[" or char == "{":
+            max_depth = self.limits.max_depth
+            if max_depth is not None and len(self.members) >= max_depth:
+                raise self.error("Nesting is deeper than the limit of {}".format(max_depth), pos)
+            self.members.append(0)
+        elif char == ",":
+            if self.members:
+                self.members[-1] += 1
+                max_members = self.limits.max_members
+                if max_members is not None and self.members[-1] >= max_members:
+                    raise self.error("Container has more members than the limit of {}".format(max_members), pos)
+        elif char == "]" or char == "}":
+            if self.members:
+                self.members.pop()
+        else:
+            return self.invalid(data, pos, final)
+        return (TOKEN_TYPE.OPERATOR, char), pos + 1
+
+    def string(self, data, pos, final):
+        syntax = self.syntax
+        parts = self.parts
+        length = len(data)
+        while True:
+            end = syntax.string_body.match(data, pos).end()
+            if end > pos:
+                parts.append(data[pos:end])
+            if end >= length:
+                if final:
+                    raise self.error("Unterminated string", end)
+                return None, end
+            if data[end:end + 1] == syntax.quote:
+                self.parts = None
+                self.string_ended(data, end + 1, final)
+                return (TOKEN_TYPE.STRING, self.decode(syntax.empty.join(parts), self.quote_index + 1 - self.index)), \
+                    end + 1
+            if end + 1 >= length:
+                if final:
+                    raise self.error("Unterminated string", end)
+                return None, end
+            char = data[end + 1:end + 2]
+            if not isinstance(char, (str, bytes)):
+                char = bytes(char)
+            if char == syntax.unicode_escape:
+                digits = syntax.hex.match(data, end + 2).group()
+                if len(digits) < 4:
+                    bad = end + 2 + len(digits)
+                    if bad < length:
+                        raise self.error("Invalid character code: {}".format(syntax.char(data, bad)), bad)
+                    if final:
+                        raise self.error("Unterminated string", length)
+                    return None, end
+                code = int(digits, 16)
+                pos = end + 6
+                if 0xd800 <= code < 0xdc00:
+                    if not final and syntax.partial_low_surrogate.match(data, pos).end() == length:
+                        return None, end
+                    low = syntax.low_surrogate.match(data, pos)
+                    if low:
+                        code = 0x10000 + ((code - 0xd800) << 10) + int(low.group(1), 16) - 0xdc00
+                        pos = low.end()
+                parts.append(syntax.encode_char(chr(code)))
+            elif char in syntax.escapes:
+                parts.append(syntax.escapes[char])
+                pos = end + 2
             else:
-                raise ValueError("Invalid character code: {}".format(char))
-            next_state = __TOKENIZER_STATE.UNICODE_4
-            char = ""
-        elif state == __TOKENIZER_STATE.UNICODE_4:
-            if char in "0123456789":
-                charcode += ord(char) - 48
-            elif char in "abcdef":
-                charcode += ord(char) - 87
-            elif char in "ABCDEF":
-                charcode += ord(char) - 55
+                raise self.error("Invalid string escape: {}".format(syntax.char(data, end + 1)), end + 1)
+
+
+def _read_chunks(stream, buffer_size):
+    """
+    Reads a stream in chunks of up to buffer_size.  Binary streams are read with read1 where they have it (or are raw
+    streams, which never wait for more than one system call), so large reads are safe for them and become the default,
+    as they are for text streams that never block.  Anything else is read one character at a time unless a buffer size
+    is given, as read may block until the full amount has arrived.
+    """
+    read = stream.read
+    if hasattr(stream, "read1"):
+        read = stream.read1
+    elif buffer_size is None and not isinstance(stream, RawIOBase) and not _never_blocks(stream):
+        buffer_size = 1
+    if buffer_size is None:
+        buffer_size = DEFAULT_BUFFER_SIZE
+    chunk = read(buffer_size)
+    while chunk:
+        yield chunk
+        chunk = read(buffer_size)
+
+
+def _never_blocks(stream):
+    """
+    Whether reading a text stream never waits for more input to arrive, as with a StringIO or a regular file on disk,
+    so that it can be read in large chunks without holding up values that are already complete.
+    """
+    if isinstance(stream, StringIO):
+        return True
+    raw = getattr(getattr(stream, "buffer", None), "raw", None)
+    return isinstance(raw, FileIO) and stat.S_ISREG(os.fstat(raw.fileno()).st_mode)
+
+
+def tokenize(stream, buffer_size=None, stats=None, limits=None, parse_int=None, parse_float=None):
+    numbers = _numbers(parse_int, parse_float)
+    if stats is None:
+        return _tokenize(stream, buffer_size, None, limits, numbers)
+    return stats.count(_tokenize(stream, buffer_size, stats, limits, numbers), True)
+
+
+def _tokenize(stream, buffer_size, stats=None, limits=None, numbers=None):
+    if _is_buffer(stream):
+        if stats is not None:
+            stats.bytes += len(stream)
+        yield from _Tokenizer(True, limits, numbers).feed(stream, True)
+        return
+    chunks = _read_chunks(stream, buffer_size)
+    if stats is not None:
+        chunks = stats.read(chunks)
+    tokenizer = None
+    for chunk in chunks:
+        if tokenizer is None:
+            tokenizer = _Tokenizer(not isinstance(chunk, str), limits, numbers)
+        yield from tokenizer.feed(chunk)
+    if tokenizer is None:
+        tokenizer = _Tokenizer(False, limits, numbers)
+    yield from tokenizer.feed(tokenizer.syntax.empty, True)
+
+
+class Limits:
+    """
+    Bounds on the documents a parse will accept, so that the memory a hostile or broken document can take up is
+    bounded too.  Each limit is None for no limit, or:
+
+    max_depth: the number of arrays and objects that may be open at once
+    max_string_length: the length of a string, as written in the input between its quotes
+    max_number_length: the length of a number, as written in the input
+    max_bytes: the size of the whole input (in characters for text)
+    max_members: the number of elements of an array or members of an object
+
+    They are checked by the tokenizer as it goes, and a ValueError with the index of the offending input is raised
+    before anything more than one chunk past a limit has been read or kept.  The limits should not be changed once
+    used.
+    """
+
+    def __init__(self, max_depth=None, max_string_length=None, max_number_length=None, max_bytes=None,
+                 max_members=None):
+        self.max_depth = max_depth
+        self.max_string_length = max_string_length
+        self.max_number_length = max_number_length
+        self.max_bytes = max_bytes
+        self.max_members = max_members
+        self.syntaxes = {}
+        self.run_patterns = {}
+
+    def syntax(self, binary, structure=False, counted=True):
+        syntax = self.syntaxes.get((binary, structure, counted))
+        if syntax is None:
+            syntax = self.syntaxes[binary, structure, counted] = _Syntax(binary, self, structure, counted)
+        return syntax
+
+    def runs(self, binary):
+        runs = self.run_patterns.get(binary)
+        if runs is None:
+            runs = self.run_patterns[binary] = _runs(binary, self)
+        return runs
+
+
+class ParseStats:
+    """
+    Collects statistics about a tokenize, parse or stream_array call it is passed to: the amount of input read (bytes,
+    or characters for text streams), the time spent blocked reading it, the number of tokens of each TOKEN_TYPE, the
+    deepest nesting, and how long each element took to arrive when streaming an array.  elapsed is the time spent
+    inside the call, not counting the time the caller spends between items, and cpu_time is the part of it not spent
+    reading.  on_element, if given, is called with the latency of each streamed element in seconds.
+
+    Pass the stats to the outermost call only; tokenize(fp, stats=stats) passed on to stream_array(..., stats=stats)
+    would count every token twice.  Nothing is measured unless stats are given, and parsing without them runs the
+    same code as it would without this class.
+    """
+
+    def __init__(self, on_element=None):
+        self.on_element = on_element
+        self.bytes = 0
+        self.reads = 0
+        self.read_time = 0.0
+        self.elapsed = 0.0
+        self.tokens = {TOKEN_TYPE.OPERATOR: 0, TOKEN_TYPE.STRING: 0, TOKEN_TYPE.NUMBER: 0, TOKEN_TYPE.BOOLEAN: 0,
+                       TOKEN_TYPE.NULL: 0}
+        self.depth = 0
+        self.max_depth = 0
+        self.elements = 0
+        self.max_element_time = 0.0
+
+    @property
+    def cpu_time(self):
+        return self.elapsed - self.read_time
+
+    def read(self, chunks):
+        clock = time.perf_counter
+        while True:
+            start = clock()
+            chunk = next(chunks, None)
+            self.read_time += clock() - start
+            if chunk is None:
+                return
+            self.reads += 1
+            self.bytes += len(chunk)
+            yield chunk
+
+    def count(self, token_stream, timed=False):
+        token_stream = iter(token_stream)
+        clock = time.perf_counter
+        tokens = self.tokens
+        while True:
+            if timed:
+                start = clock()
+                token = next(token_stream, None)
+                self.elapsed += clock() - start
             else:
-                raise ValueError("Invalid character code: {}".format(char))
-            next_state = __TOKENIZER_STATE.STRING
-            char = chr(charcode)
-            add_char = True
-
-        if add_char:
-            token.append(char)
-
-        return advance, next_state, charcode
-    state = __TOKENIZER_STATE.WHITESPACE
-    char = stream.read(1)
-    index = 0
-    while char:
-        try:
-            advance, state, charcode = process_char(char, charcode)
-        except ValueError as e:
-            raise ValueError("".join([e.args[0], " at index {}".format(index)]))
-        if completed:
-            completed = False
-            token = []
-            yield now_token
-        if advance:
-            char = stream.read(1)
-            index += 1
-    process_char(" ", charcode)
-    if completed:
-        yield now_token
+                token = next(token_stream, None)
+            if token is None:
+                return
+            token_type, value = token
+            tokens[token_type] += 1
+            if token_type == TOKEN_TYPE.OPERATOR:
+                if value == "[" or value == "{":
+                    self.depth += 1
+                    if self.depth > self.max_depth:
+                        self.max_depth = self.depth
+                elif value == "]" or value == "}":
+                    self.depth -= 1
+            yield token
+
+    def stream(self, values):
+        clock = time.perf_counter
+        while True:
+            start = clock()
+            try:
+                value = next(values)
+            except StopIteration:
+                self.elapsed += clock() - start
+                return
+            latency = clock() - start
+            self.elapsed += latency
+            self.elements += 1
+            if latency > self.max_element_time:
+                self.max_element_time = latency
+            if self.on_element is not None:
+                self.on_element(latency)
+            yield value
+
 
+class KeyCache:
+    """
+    Interns object keys, so that the keys of the many objects in a large document or stream share one str each rather
+    than holding a copy per object.  It also remembers the sequences of keys (shapes) that objects have, so an object
+    of a known shape is built from its values in one go.  Both are bounded, and the oldest entries are evicted first
+    once full.  A cache can be shared by any number of parses.
+    """
 
-def parse_string(string):
-    return parse(StringIO(string))
+    def __init__(self, max_keys=65536, max_shapes=4096):
+        self.max_keys = max_keys
+        self.max_shapes = max_shapes
+        self.keys = {}
+        self.shapes = {}
 
-def parse(file):
-    token_stream = tokenize(file)
-    val, token_type, token = __parse(token_stream, next(token_stream))
-    if token is not None:
-        raise ValueError("Improperly closed JSON object")
+    def key(self, key):
+        keys = self.keys
+        interned = keys.get(key)
+        if interned is None:
+            if len(keys) >= self.max_keys:
+                del keys[next(iter(keys))]
+            keys[key] = interned = key
+        return interned
+
+    def build(self, keys, values):
+        shapes = self.shapes
+        shape = tuple(keys)
+        known = shapes.get(shape)
+        if known is None:
+            if len(shapes) >= self.max_shapes:
+                del shapes[next(iter(shapes))]
+            known = tuple(self.key(key) for key in shape)
+            shapes[known] = known
+        return dict(zip(known, values))
+
+
+def parse_string(string, key_cache=None, stats=None, limits=None, parse_int=None, parse_float=None):
+    if stats is not None:
+        return parse(StringIO(string) if isinstance(string, str) else string, key_cache=key_cache, stats=stats,
+                     limits=limits, parse_int=parse_int, parse_float=parse_float)
+    parser = _FusedParser(not isinstance(string, str), key_cache, limits, _numbers(parse_int, parse_float))
+    parser.feed(string, True)
+    return parser.close()
+
+
+def parse(file, buffer_size=DEFAULT_BUFFER_SIZE, key_cache=None, stats=None, limits=None, parse_int=None,
+          parse_float=None):
+    numbers = _numbers(parse_int, parse_float)
+    if stats is not None:
+        return _parse_counted(file, buffer_size, key_cache, stats, limits, numbers)
+    if _is_buffer(file):
+        return parse_string(file, key_cache, limits=limits, parse_int=parse_int, parse_float=parse_float)
+    parser = None
+    for chunk in _read_chunks(file, buffer_size):
+        if parser is None:
+            parser = _FusedParser(not isinstance(chunk, str), key_cache, limits, numbers)
+        parser.feed(chunk)
+    if parser is None:
+        parser = _FusedParser(False, key_cache, limits, numbers)
+    parser.feed(parser.syntax.empty, True)
+    return parser.close()
+
+
+def _parse_counted(file, buffer_size, key_cache, stats, limits, numbers):
+    start = time.perf_counter()
     try:
-        next(token_stream)
-    except StopIteration:
-        return val
-    raise ValueError("Additional string after end of JSON")
+        parser = _FusedParser(False, key_cache)
+        for token in stats.count(_tokenize(file, buffer_size, stats, limits, numbers)):
+            parser.push(token)
+        return parser.close()
+    finally:
+        stats.elapsed += time.perf_counter() - start
     
 
 
-def __parse(token_stream, first_token):
-    class KVP:
-        def __init__(self, key):
-            self.key = key
-            self.value = None
-            self.set = False
+def _parse_value(token_stream):
+    try:
+        first_token = next(token_stream)
+    except StopIteration as e:
+        raise ValueError("Expected a JSON value") from e
+    value = _build(token_stream, first_token, None)
+    for _ in token_stream:
+        raise ValueError("Additional string after end of JSON")
+    return value
+
+
+def _token_stream(source, stats=None, limits=None, numbers=None):
+    if _is_buffer(source) or hasattr(source, "read"):
+        return _tokenize(source, None, stats, limits, numbers)
+    if limits is not None:
+        raise ValueError("Limits are checked by the tokenizer, so pass them to tokenize rather than with its tokens")
+    if numbers is not None:
+        raise ValueError("Numbers are converted by the tokenizer, so pass parse_int and parse_float to tokenize rather "
+                         "than with its tokens")
+    return source
 
-        def __str__(self):
-            if self.set:
-                return "{}: {}".format(self.key, self.value)
-            else:
-                return "{}: <NULL>".format(self.key)
-
-    stack = []
-    token_type, token = first_token
-    if token_type == TOKEN_TYPE.OPERATOR:
-        if token == "{":
-            stack.append({})
-        elif token == "[":
-            stack.append([])
+
+def stream_array(token_stream, key_cache=None, stats=None, limits=None, parse_int=None, parse_float=None,
+                 batch_size=None, max_latency=None, checkpoints=False, resume_from=None):
+    numbers = _numbers(parse_int, parse_float)
+    if checkpoints or resume_from is not None:
+        values = _stream_array_resumable(token_stream, key_cache, stats, limits, numbers, checkpoints, resume_from)
+        if stats is not None:
+            values = stats.stream(values)
+    elif stats is None:
+        values = _stream_array(_token_stream(token_stream, None, limits, numbers), key_cache)
+    else:
+        token_stream = stats.count(_token_stream(token_stream, stats, limits, numbers))
+        values = stats.stream(_stream_array(token_stream, key_cache))
+    if batch_size is None:
+        if max_latency is not None:
+            raise ValueError("max_latency requires a batch_size")
+        return values
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if max_latency is None:
+        return _batches(values, batch_size)
+    return _timed_batches(values, batch_size, max_latency)
+
+
+def _stream_array(token_stream, key_cache):
+    elements = _ArrayElements(key_cache)
+    for token in token_stream:
+        value = elements.push(token)
+        if value is not _INCOMPLETE:
+            yield value
+    elements.close()
+
+
+class Checkpoint:
+    """
+    A point in the top level array read by stream_array(..., checkpoints=True) just after one of its elements, from
+    which stream_array(..., resume_from=checkpoint) carries on with the next element.  It is made up of plain values,
+    so it can be saved with to_dict and made again with Checkpoint(**values):
+
+    offset: how far into the input to resume, in bytes for binary input or characters for text
+    elements: the number of elements streamed up to and including the one just before the checkpoint
+    binary: whether the input was binary
+    skip: whether the element at offset is the one just before the checkpoint, which is then parsed again but not
+    streamed.  This is the case for numbers, strings and literals, as the tokenizer only knows where brackets and
+    commas are.
+    """
+
+    __slots__ = ("offset", "elements", "binary", "skip")
+
+    def __init__(self, offset, elements, binary, skip):
+        self.offset = offset
+        self.elements = elements
+        self.binary = binary
+        self.skip = skip
+
+    def to_dict(self):
+        return {"offset": self.offset, "elements": self.elements, "binary": self.binary, "skip": self.skip}
+
+    def __eq__(self, other):
+        return isinstance(other, Checkpoint) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return "Checkpoint(offset={}, elements={}, binary={}, skip={})".format(self.offset, self.elements,
+                                                                              self.binary, self.skip)
+
+
+class _PositionTokenizer(_Tokenizer):
+    """
+    A tokenizer that keeps track of where the elements of the top level array are, for checkpoints.  Brackets and
+    commas take the slow path, as they do when limits count them, and boundary is set to the offset just past the last
+    one at the top level: past the opening bracket or a comma (before an element), or past the closing bracket of an
+    element (after it, in which case ended is set).
+    """
+
+    def __init__(self, binary=False, limits=None, numbers=None):
+        super().__init__(binary, limits, numbers)
+        self.syntax = _STRUCTURE[binary] if limits is None else limits.syntax(binary, True)
+        self.slow_paths = self.slow_paths[:8] + (self.structure,)
+        self.depth = 0
+        self.boundary = 0
+        self.ended = False
+
+    def structure(self, data, pos, final):
+        if self.limits is not None:
+            token, end = _Tokenizer.structure(self, data, pos, final)
         else:
-            raise ValueError("Expected object or array.  Got '{}'".format(token))
+            char = self.syntax.char(data, pos)
+            if char not in "[]{},":
+                return self.invalid(data, pos, final)
+            token, end = (TOKEN_TYPE.OPERATOR, char), pos + 1
+        char = token[1]
+        if char == "[" or char == "{":
+            self.depth += 1
+            if self.depth == 1:
+                self.boundary = self.index + end
+                self.ended = False
+        elif char == "]" or char == "}":
+            self.depth -= 1
+            if self.depth == 1:
+                self.boundary = self.index + end
+                self.ended = True
+        elif self.depth == 1:
+            self.boundary = self.index + end
+            self.ended = False
+        return token, end
+
+
+def _resumed_chunks(source, checkpoint):
+    """
+    Reads source from checkpoint's offset on.  Seekable binary files and StringIO are seeked (relative to where they
+    are now, which should be where the checkpointed stream started), and other files are read up to the offset, as
+    text files cannot be seeked to a character.
+    """
+    offset = checkpoint.offset
+    if _is_buffer(source):
+        yield memoryview(source)[offset:]
+        return
+    seekable = getattr(source, "seekable", None)
+    if checkpoint.binary and seekable is not None and seekable():
+        source.seek(offset, os.SEEK_CUR)
+    elif isinstance(source, StringIO):
+        source.seek(source.tell() + offset)
     else:
-        raise ValueError("Expected object or array.  Got '{}'".format(token))
+        while offset:
+            skipped = len(source.read(min(offset, DEFAULT_BUFFER_SIZE)))
+            if not skipped:
+                break
+            offset -= skipped
+    yield from _read_chunks(source, None)
 
-    last_type, last_token = token_type, token
-    try:
-        token_type, token = next(token_stream)
-    except StopIteration as e:
-        raise ValueError("Too many opening braces") from e
+
+def _stream_array_resumable(source, key_cache, stats, limits, numbers, checkpoints, resume_from):
+    if not (_is_buffer(source) or hasattr(source, "read")):
+        raise ValueError("Checkpoints need a file or buffer to read, not tokens")
+    elements = _ArrayElements(key_cache)
+    count = 0
+    skip = False
+    if resume_from is None:
+        chunks = _read_chunks(source, None) if hasattr(source, "read") else iter((source,))
+    else:
+        chunks = _resumed_chunks(source, resume_from)
+        elements.started = True
+        elements.empty = False
+        elements.expect_value = skip = resume_from.skip
+        count = resume_from.elements
+    if stats is not None:
+        chunks = stats.read(chunks)
+    chunk = next(chunks, None)
+    binary = chunk is not None and not isinstance(chunk, str)
+    if resume_from is not None and chunk is not None and binary != resume_from.binary:
+        raise ValueError("The checkpoint is for {} input".format("binary" if resume_from.binary else "text"))
+    tokenizer = _PositionTokenizer(binary, limits, numbers)
+    if resume_from is not None:
+        tokenizer.index = tokenizer.boundary = resume_from.offset
+        tokenizer.depth = 1
+        if limits is not None:
+            tokenizer.members.append(count - 1)
+
+    def tokens():
+        if chunk is not None:
+            yield from tokenizer.feed(chunk)
+            for more in chunks:
+                yield from tokenizer.feed(more)
+        yield from tokenizer.feed(tokenizer.syntax.empty, True)
+
+    token_stream = tokens() if stats is None else stats.count(tokens())
+    for token in token_stream:
+        value = elements.push(token)
+        if value is _INCOMPLETE:
+            continue
+        if skip:
+            skip = False
+            continue
+        count += 1
+        if checkpoints:
+            yield value, Checkpoint(tokenizer.boundary, count, binary, not tokenizer.ended)
+        else:
+            yield value
+    elements.close()
+
+
+def _batches(values, batch_size):
+    batch = []
+    for value in values:
+        batch.append(value)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _timed_batches(values, batch_size, max_latency):
+    """
+    Batches values, but flushes a batch early once its first value has waited max_latency seconds, even while the
+    producer is blocked reading.  The values are produced on a separate thread for that, and handed over through a
+    bounded queue, so the thread never runs more than batch_size values ahead.
+    """
+    items = queue.Queue(batch_size)
+    stop = threading.Event()
+    end = object()
+
+    def produce():
+        try:
+            for value in values:
+                items.put((value, None))
+                if stop.is_set():
+                    return
+            items.put((end, None))
+        except BaseException as e:
+            items.put((end, e))
+
+    threading.Thread(target=produce, daemon=True).start()
+    batch = []
+    deadline = None
     try:
         while True:
-            if isinstance(stack[-1], list):
-                if last_type == TOKEN_TYPE.OPERATOR:
-                    if last_token == "[":
-                        if token_type == TOKEN_TYPE.OPERATOR:
-                            if token == "{":
-                                stack.append({})
-                            elif token == "[":
-                                stack.append([])
-                            elif token != "]":
-                                raise ValueError("Array must either be empty or contain a value.  Got '{}'".
-                                                 format(token))
-                        else:
-                            stack.append(token)
-                    elif last_token == ",":
-                        if token_type == TOKEN_TYPE.OPERATOR:
-                            if token == "{":
-                                stack.append({})
-                            elif token == "[":
-                                stack.append([])
-                            else:
-                                raise ValueError("Array value expected.  Got '{}'".format(token))
-                        else:
-                            stack.append(token)
-                    elif last_token == "]":
-                        value = stack.pop()
-                        if len(stack) == 0:
-                            return value, token_type, token
-                        if isinstance(stack[-1], list):
-                            stack[-1].append(value)
-                        elif isinstance(stack[-1], dict):
-                            stack[-1][value.key] = value.value
-                        elif isinstance(stack[-1], KVP):
-                            stack[-1].value = value
-                            stack[-1].set = True
-                            value = stack.pop()
-                            if len(stack) == 0:
-                                return value, token_type, token
-                            if isinstance(stack[-1], list):
-                                stack[-1].append(value)
-                            elif isinstance(stack[-1], dict):
-                                stack[-1][value.key] = value.value
+            try:
+                if deadline is None:
+                    value, error = items.get()
+                else:
+                    value, error = items.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                yield batch
+                batch = []
+                deadline = None
+                continue
+            if value is end:
+                if error is not None:
+                    raise error
+                if batch:
+                    yield batch
+                return
+            batch.append(value)
+            if deadline is None:
+                deadline = time.monotonic() + max_latency
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+                deadline = None
+    finally:
+        stop.set()
+        try:
+            while True:
+                items.get_nowait()
+        except queue.Empty:
+            pass
+
+
+_INCOMPLETE = object()
+
+
+class _BUILDER_STATE:
+    VALUE = 0
+    ARRAY_FIRST = 1
+    ARRAY_VALUE = 2
+    ARRAY_NEXT = 3
+    OBJECT_FIRST = 4
+    OBJECT_KEY = 5
+    OBJECT_COLON = 6
+    OBJECT_VALUE = 7
+    OBJECT_NEXT = 8
+    DONE = 9
+
+
+class _ValueBuilder:
+    """
+    Builds a single JSON value from tokens pushed in one at a time, keeping the containers that are still open on an
+    explicit stack between calls.  Objects are collected as lists of keys and values, and only turned into a dict once
+    closed.  push returns the value once its last token has been seen, and _INCOMPLETE until then.
+    """
+
+    def __init__(self, key_cache=None):
+        self.containers = []
+        self.keys = []
+        self.key_cache = key_cache
+        self.state = _BUILDER_STATE.VALUE
+
+    def push(self, token):
+        token_type, value = token
+        state = self.state
+        if token_type == TOKEN_TYPE.OPERATOR:
+            if value == "[" or value == "{":
+                if state != _BUILDER_STATE.VALUE and state != _BUILDER_STATE.ARRAY_FIRST and \
+                        state != _BUILDER_STATE.ARRAY_VALUE and state != _BUILDER_STATE.OBJECT_VALUE:
+                    raise self.unexpected(value)
+                self.containers.append([])
+                if value == "[":
+                    self.keys.append(None)
+                    self.state = _BUILDER_STATE.ARRAY_FIRST
+                else:
+                    self.keys.append([])
+                    self.state = _BUILDER_STATE.OBJECT_FIRST
+                return _INCOMPLETE
+            if value == "]":
+                if state != _BUILDER_STATE.ARRAY_FIRST and state != _BUILDER_STATE.ARRAY_NEXT:
+                    raise self.unexpected(value)
+                self.keys.pop()
+                return self.complete(self.containers.pop())
+            if value == "}":
+                if state != _BUILDER_STATE.OBJECT_FIRST and state != _BUILDER_STATE.OBJECT_NEXT:
+                    raise self.unexpected(value)
+                keys = self.keys.pop()
+                if self.key_cache:
+                    return self.complete(self.key_cache.build(keys, self.containers.pop()))
+                return self.complete(dict(zip(keys, self.containers.pop())))
+            if value == ",":
+                if state == _BUILDER_STATE.ARRAY_NEXT:
+                    self.state = _BUILDER_STATE.ARRAY_VALUE
+                elif state == _BUILDER_STATE.OBJECT_NEXT:
+                    self.state = _BUILDER_STATE.OBJECT_KEY
+                else:
+                    raise self.unexpected(value)
+                return _INCOMPLETE
+            if state != _BUILDER_STATE.OBJECT_COLON:
+                raise self.unexpected(value)
+            self.state = _BUILDER_STATE.OBJECT_VALUE
+            return _INCOMPLETE
+        if state == _BUILDER_STATE.OBJECT_FIRST or state == _BUILDER_STATE.OBJECT_KEY:
+            if token_type != TOKEN_TYPE.STRING:
+                raise ValueError("Object keys must be strings.  Got '{}'".format(value))
+            self.keys[-1].append(value)
+            self.state = _BUILDER_STATE.OBJECT_COLON
+            return _INCOMPLETE
+        if state != _BUILDER_STATE.VALUE and state != _BUILDER_STATE.ARRAY_FIRST and \
+                state != _BUILDER_STATE.ARRAY_VALUE and state != _BUILDER_STATE.OBJECT_VALUE:
+            raise self.unexpected(value)
+        return self.complete(value)
+
+    def complete(self, value):
+        if not self.containers:
+            self.state = _BUILDER_STATE.DONE
+            return value
+        self.containers[-1].append(value)
+        self.state = _BUILDER_STATE.ARRAY_NEXT if self.keys[-1] is None else _BUILDER_STATE.OBJECT_NEXT
+        return _INCOMPLETE
+
+    def unexpected(self, value):
+        return ValueError(_unexpected(self.state, value))
+
+
+def _unexpected(state, value):
+    """
+    The message for a token that cannot follow what came before it, given the builder state it arrived in.
+    """
+    if state == _BUILDER_STATE.DONE:
+        return "Additional string after end of JSON"
+    if state == _BUILDER_STATE.ARRAY_NEXT:
+        return "Array items must be followed by a comma or closing bracket.  Got '{}'".format(value)
+    if state == _BUILDER_STATE.OBJECT_NEXT:
+        return "Object key value pairs should be followed by ',' or '}}'.  Got '{}'".format(value)
+    if state == _BUILDER_STATE.OBJECT_COLON:
+        return "Object keys must be separated from values by a single ':'.  Got '{}'".format(value)
+    if state == _BUILDER_STATE.OBJECT_FIRST or state == _BUILDER_STATE.OBJECT_KEY:
+        return "Object key expected.  Got '{}'".format(value)
+    return "JSON value expected.  Got '{}'".format(value)
+
+
+class _ArrayElements:
+    """
+    Splits the tokens of a top level array into its elements, one token at a time, so that input can be pushed in as
+    it arrives rather than pulled by the parser.  push returns each element as soon as its last token is seen, and
+    _INCOMPLETE otherwise.
+    """
+
+    def __init__(self, key_cache=None):
+        self.key_cache = key_cache
+        self.started = False
+        self.closed = False
+        self.expect_value = True
+        self.empty = True
+        self.builder = None
+
+    def push(self, token):
+        if self.builder is not None:
+            value = self.builder.push(token)
+            if value is not _INCOMPLETE:
+                self.builder = None
+            return value
+        token_type, value = token
+        if self.closed:
+            raise ValueError("Additional string after end of JSON")
+        if not self.started:
+            if token_type != TOKEN_TYPE.OPERATOR or value != "[":
+                raise ValueError("Array must start with '['.  Got '{}'".format(value))
+            self.started = True
+            return _INCOMPLETE
+        if token_type == TOKEN_TYPE.OPERATOR:
+            if value == "]" and (self.empty or not self.expect_value):
+                self.closed = True
+                return _INCOMPLETE
+            if value == "," and not self.expect_value:
+                self.expect_value = True
+                return _INCOMPLETE
+            if not self.expect_value:
+                raise ValueError("Array entries must be followed by ',' or ']'.  Got '{}'".format(value))
+            if value != "[" and value != "{":
+                raise ValueError("Expected an array value.  Got '{}'".format(value))
+        elif not self.expect_value:
+            raise ValueError("Array entries must be followed by ',' or ']'.  Got '{}'".format(value))
+        self.expect_value = False
+        self.empty = False
+        if token_type == TOKEN_TYPE.OPERATOR:
+            self.builder = _ValueBuilder(self.key_cache)
+            return self.builder.push(token)
+        return value
+
+    def close(self):
+        if not self.closed:
+            raise ValueError("Array not properly closed")
+
+
+_VALUE_STATES = frozenset((_BUILDER_STATE.ARRAY_FIRST, _BUILDER_STATE.ARRAY_VALUE, _BUILDER_STATE.OBJECT_VALUE))
+
+
+class _FusedParser(_Tokenizer):
+    """
+    Parses a whole document straight from its text, without producing tokens.  The tokenizer's master pattern is
+    matched directly against the input, and each match updates the container stack of a _ValueBuilder inline.  Only
+    the slow path (escaped strings, tokens cut off by the end of a chunk, errors) goes through tokens and the builder's
+    push.  Input is fed in chunks like the tokenizer, and the root object or array is in value once done is set.
+    """
+
+    def __init__(self, binary=False, key_cache=None, limits=None, numbers=None):
+        super().__init__(binary, limits, numbers)
+        self.builder = _ValueBuilder(key_cache)
+        self.done = False
+        self.value = None
+
+    def push(self, token):
+        builder = self.builder
+        if self.done:
+            raise ValueError("Additional string after end of JSON")
+        if builder.state == _BUILDER_STATE.VALUE and token[0] != TOKEN_TYPE.OPERATOR:
+            raise ValueError("Expected object or array.  Got '{}'".format(token[1]))
+        value = builder.push(token)
+        if value is not _INCOMPLETE:
+            builder.state = self.complete(value)
+
+    def complete(self, value):
+        self.done = True
+        self.value = value
+        return _BUILDER_STATE.DONE
+
+    def feed(self, data, final=False):
+        syntax = self.syntax
+        if self.pending:
+            data = self.pending + data
+        length = len(data)
+        if self.limits is not None:
+            self.check_size(length)
+        pos = 0
+        if self.parts is not None:
+            token, pos = self.string(data, 0, final)
+            if token is None:
+                self.carry(data, pos)
+                return
+            self.push(token)
+        if self.string_end and pos < length:
+            self.string_end = False
+            self.string_ended(data, pos, final)
+        match_token = syntax.token.match
+        constants = syntax.constants
+        binary = syntax.binary
+        slow_paths = self.slow_paths
+        builder = self.builder
+        containers = builder.containers
+        keys = builder.keys
+        key_cache = builder.key_cache
+        parse_int = self.parse_int
+        parse_float = self.parse_float
+        state = builder.state
+        try:
+            while True:
+                match = match_token(data, pos)
+                kind = match.lastindex
+                if kind == 2:
+                    value = match.group(2)
+                    if binary:
+                        value = value.decode("utf-8", "surrogatepass")
+                    if state == _BUILDER_STATE.OBJECT_KEY or state == _BUILDER_STATE.OBJECT_FIRST:
+                        keys[-1].append(value)
+                        state = _BUILDER_STATE.OBJECT_COLON
+                        pos = match.end()
+                        continue
+                    token = TOKEN_TYPE.STRING, value
+                elif kind == 1:
+                    token = constants[match.group(1)]
+                    value = token[1]
+                    if token[0] == TOKEN_TYPE.OPERATOR:
+                        if value == ",":
+                            if state == _BUILDER_STATE.ARRAY_NEXT:
+                                state = _BUILDER_STATE.ARRAY_VALUE
+                                pos = match.end()
+                                continue
+                            if state == _BUILDER_STATE.OBJECT_NEXT:
+                                state = _BUILDER_STATE.OBJECT_KEY
+                                pos = match.end()
+                                continue
+                        elif value == ":":
+                            if state == _BUILDER_STATE.OBJECT_COLON:
+                                state = _BUILDER_STATE.OBJECT_VALUE
+                                pos = match.end()
+                                continue
+                        elif value == "[" or value == "{":
+                            if state in _VALUE_STATES or state == _BUILDER_STATE.VALUE and not self.done:
+                                containers.append([])
+                                if value == "[":
+                                    keys.append(None)
+                                    state = _BUILDER_STATE.ARRAY_FIRST
+                                else:
+                                    keys.append([])
+                                    state = _BUILDER_STATE.OBJECT_FIRST
+                                pos = match.end()
+                                continue
+                        elif value == "]":
+                            if state == _BUILDER_STATE.ARRAY_FIRST or state == _BUILDER_STATE.ARRAY_NEXT:
+                                keys.pop()
+                                value = containers.pop()
+                        elif state == _BUILDER_STATE.OBJECT_FIRST or state == _BUILDER_STATE.OBJECT_NEXT:
+                            if key_cache:
+                                value = key_cache.build(keys.pop(), containers.pop())
                             else:
-                                raise ValueError("Array items must be followed by a comma or closing bracket.  "
-                                                 "Got '{}'".format(value))
-                        else:
-                            raise ValueError("Array items must be followed by a comma or closing bracket.  "
-                                             "Got '{}'".format(value))
-                    elif last_token == "}":
-                        raise ValueError("Array closed with a '}'")
-                    else:
-                        raise ValueError("Array should not contain ':'")
+                                value = dict(zip(keys.pop(), containers.pop()))
+                        # value is still the operator unless a container was closed above
+                        if value is token[1]:
+                            builder.state = state
+                            self.push(token)
+                            state = builder.state
+                            pos = match.end()
+                            continue
+                        if not containers:
+                            state = self.complete(value)
+                            pos = match.end()
+                            continue
+                        containers[-1].append(value)
+                        state = _BUILDER_STATE.ARRAY_NEXT if keys[-1] is None else _BUILDER_STATE.OBJECT_NEXT
+                        pos = match.end()
+                        continue
+                elif kind == 3:
+                    token = TOKEN_TYPE.NUMBER, parse_int(match.group(3))
+                elif kind == 4:
+                    token = TOKEN_TYPE.NUMBER, parse_float(match.group(4))
+                elif kind is None:
+                    pos = length
+                    break
                 else:
-                    raise ValueError("Unknown Error")
-            elif isinstance(stack[-1], dict):
-                if last_type == TOKEN_TYPE.OPERATOR:
-                    if last_token == "{":
-                        if token_type == TOKEN_TYPE.OPERATOR:
-                            if token == "{":
-                                stack.append({})
-                            elif token == "[":
-                                stack.append([])
-                            elif token != "}":
-                                raise ValueError("Object must either be empty or contain key value pairs."
-                                                 "  Got '{}'".format(token))
-                        elif token_type == TOKEN_TYPE.STRING:
-                            stack.append(KVP(token))
-                        else:
-                            raise ValueError("Object keys must be strings.  Got '{}'".format(token))
-                    elif last_token == ",":
-                        if token_type == TOKEN_TYPE.OPERATOR:
-                            if token == "{":
-                                stack.append({})
-                            elif token == "[":
-                                stack.append([])
+                    token, pos = slow_paths[kind](data, match.start(kind), final)
+                    if token is None:
+                        break
+                    builder.state = state
+                    self.push(token)
+                    state = builder.state
+                    continue
+                if state in _VALUE_STATES:
+                    containers[-1].append(token[1])
+                    state = _BUILDER_STATE.ARRAY_NEXT if keys[-1] is None else _BUILDER_STATE.OBJECT_NEXT
+                else:
+                    builder.state = state
+                    self.push(token)
+                    state = builder.state
+                pos = match.end()
+        except UnicodeDecodeError as e:
+            raise self.error("Invalid UTF-8", match.start(2) + e.start) from None
+        finally:
+            builder.state = state
+        self.carry(data, pos)
+
+    def close(self):
+        if not self.done:
+            raise ValueError("JSON Object not properly closed")
+        return self.value
+
+
+class _DocumentParser(_FusedParser):
+    """
+    Parses a stream of JSON documents, one after another, with a single parser.  Documents may be separated by
+    whitespace (as in newline delimited JSON) or by nothing at all where the syntax allows, and may be any JSON value.
+    A string that makes up a whole document may be followed directly by a string, an array or an object.  Completed
+    documents are appended to values.
+    """
+
+    def __init__(self, binary=False, key_cache=None, limits=None, numbers=None):
+        super().__init__(binary, key_cache, limits, numbers)
+        self.values = []
+
+    def string_ended(self, data, end, final):
+        if end < len(data) and not self.builder.containers and self.syntax.char(data, end) in "\"[{":
+            return
+        super().string_ended(data, end, final)
+
+    def push(self, token):
+        value = self.builder.push(token)
+        if value is not _INCOMPLETE:
+            self.builder.state = self.complete(value)
+
+    def complete(self, value):
+        self.values.append(value)
+        return _BUILDER_STATE.VALUE
+
+    def close(self):
+        if self.builder.state != _BUILDER_STATE.VALUE:
+            raise ValueError("JSON Object not properly closed")
+
+
+class _Discarded(list):
+    """
+    Stands in for the parts of a string spanning several chunks when its value is not needed.
+    """
+
+    def append(self, part):
+        pass
+
+
+_DISCARDED = _Discarded()
+
+
+def _ignore(text):
+    return None
+
+
+# the depth of the containers the validator can skip over in a run, and the number of runs it goes without at a depth
+# after one there fails, as the data there most likely has the same shape again
+_RUN_DEPTH = 3
+_RUN_BACKOFF = 32
+
+
+def _runs(binary, limits=None):
+    """
+    Patterns matching runs of array elements and of object members, so that the validator skips over data a run at
+    a time rather than a token at a time.  Values are scalars or containers up to _RUN_DEPTH deep, whose full grammar
+    is checked by the pattern, and anything else ends the run for the tokenizer to go on from.  Under limits, strings
+    and numbers past their maximum length end the run too, and so do containers with more than max_members, in which
+    case a run is a single element or member, so that the validator can count the members of the container it is in.
+    A run ends with a comma, or with the closing bracket of its container (group 1), so it never ends in a token cut
+    off by the end of a chunk.
+    """
+    key = r'"[^"\\]*"'
+    number = r'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?'
+    if limits is not None and limits.max_string_length is not None:
+        key = r'"[^"\\]{0,%d}"' % limits.max_string_length
+    if limits is not None and limits.max_number_length is not None:
+        number = r"(?![-+.eE0-9]{%d})" % (limits.max_number_length + 1) + number
+    value = r'(?:' + key + r'|' + number + r'|true|false|null)'
+    repeat = "*"
+    if limits is not None and limits.max_members is not None:
+        repeat = "{0,%d}" % limits.max_members
+    for _ in range(_RUN_DEPTH):
+        value = (r'(?:' + value +
+                 r'|\[\s*(?:' + value + r'\s*(?:,(?!\s*\])\s*|(?=\])))' + repeat + r'\]'
+                 r'|\{\s*(?:' + key + r'\s*:\s*' + value + r'\s*(?:,(?!\s*\})\s*|(?=\})))' + repeat + r'\})')
+    element = r"\s*" + value + r"\s*"
+    member = r"\s*" + key + r"\s*:\s*" + value + r"\s*"
+    elements = element + r"(?:,|(\]))"
+    members = member + r"(?:,|(\}))"
+    if repeat == "*":
+        elements = r"(?:" + element + r",)*" + elements
+        members = r"(?:" + member + r",)*" + members
+    if binary:
+        return re.compile(elements.encode("ascii")).match, re.compile(members.encode("ascii")).match
+    return re.compile(elements).match, re.compile(members).match
+
+
+_RUNS = {False: _runs(False), True: _runs(True)}
+
+
+class _Validator(_Tokenizer):
+    """
+    Checks that input is a single well formed JSON document without building it.  The tokenizer's pattern is matched
+    directly against the input as in _FusedParser, but strings are not decoded, numbers not converted and containers
+    not built: all that is kept is whether each open container is an object or an array.  Runs of elements and members
+    are skipped with a single match each, checking any limits on the way, except where they could open containers
+    nested past max_depth.  Depth and members are counted here rather than by the tokenizer, so brackets and commas
+    still take the fast path under limits.  With stats, every token is counted and nothing is skipped.
+    """
+
+    def __init__(self, binary=False, limits=None, stats=None):
+        super().__init__(binary, limits)
+        self.parse_int = self.parse_float = _ignore
+        self.objects = []
+        self.state = _BUILDER_STATE.VALUE
+        self.stats = stats
+        self.max_depth = self.max_members = None
+        self.runs = _RUNS[binary]
+        if limits is not None:
+            self.syntax = limits.syntax(binary, counted=False)
+            self.max_depth = limits.max_depth
+            self.max_members = limits.max_members
+            self.runs = limits.runs(binary)
+        if stats is not None:
+            self.runs = (None, None)
+        # runs may open containers up to _RUN_DEPTH deeper than the one they start in
+        self.run_depth = None if self.max_depth is None else self.max_depth - _RUN_DEPTH
+        # the number of runs still to go without at each depth, after one there failed
+        self.backoff = {}
+        # the members of each open container so far, when max_members is set
+        self.counts = []
+        # strings are not decoded, so binary input is checked to be UTF-8 as it is fed instead
+        self.utf8 = codecs.getincrementaldecoder("utf-8")("surrogatepass").decode if binary else None
+
+    def string_start(self, data, pos, final):
+        match = self.syntax.escaped_string.match(data, pos + 1)
+        if match:
+            self.string_ended(data, match.end(), final)
+            return (TOKEN_TYPE.STRING, None), match.end()
+        self.parts = _DISCARDED
+        return self.string(data, pos + 1, final)
+
+    def push(self, token, data, start, end):
+        """
+        Moves the grammar on by one token, which comes with the span of data it was read from, as error messages quote
+        it and give its index while its value is not kept.
+        """
+        token_type, value = token
+        state = self.state
+        objects = self.objects
+        if token_type == TOKEN_TYPE.OPERATOR:
+            if value == "[" or value == "{":
+                if state not in _VALUE_STATES and state != _BUILDER_STATE.VALUE:
+                    raise self.error(_unexpected(state, value), start)
+                objects.append(value == "{")
+                self.state = _BUILDER_STATE.OBJECT_FIRST if value == "{" else _BUILDER_STATE.ARRAY_FIRST
+                return
+            if value == "]" or value == "}":
+                if value == "]" and state != _BUILDER_STATE.ARRAY_FIRST and state != _BUILDER_STATE.ARRAY_NEXT or \
+                        value == "}" and state != _BUILDER_STATE.OBJECT_FIRST and state != _BUILDER_STATE.OBJECT_NEXT:
+                    raise self.error(_unexpected(state, value), start)
+                objects.pop()
+            elif value == ",":
+                if state == _BUILDER_STATE.ARRAY_NEXT:
+                    self.state = _BUILDER_STATE.ARRAY_VALUE
+                elif state == _BUILDER_STATE.OBJECT_NEXT:
+                    self.state = _BUILDER_STATE.OBJECT_KEY
+                else:
+                    raise self.error(_unexpected(state, value), start)
+                return
+            else:
+                if state != _BUILDER_STATE.OBJECT_COLON:
+                    raise self.error(_unexpected(state, value), start)
+                self.state = _BUILDER_STATE.OBJECT_VALUE
+                return
+        else:
+            if state == _BUILDER_STATE.OBJECT_FIRST or state == _BUILDER_STATE.OBJECT_KEY:
+                if token_type != TOKEN_TYPE.STRING:
+                    raise self.error("Object keys must be strings.  Got '{}'".format(
+                        self.quote(data, start, end)), start)
+                self.state = _BUILDER_STATE.OBJECT_COLON
+                return
+            if state == _BUILDER_STATE.VALUE:
+                raise self.error("Expected object or array.  Got '{}'".format(self.quote(data, start, end)), start)
+            if state not in _VALUE_STATES:
+                raise self.error(_unexpected(state, self.quote(data, start, end)), start)
+        if not objects:
+            self.state = _BUILDER_STATE.DONE
+        else:
+            self.state = _BUILDER_STATE.OBJECT_NEXT if objects[-1] else _BUILDER_STATE.ARRAY_NEXT
+
+    def quote(self, data, start, end):
+        """
+        The text of a scalar for an error message, as its value is not kept.  Only the span in the current chunk is
+        known, which may start part way through a character, so binary input is decoded leniently.
+        """
+        if self.syntax.binary:
+            return bytes(data[start:end]).decode("utf-8", "replace")
+        return data[start:end]
+
+    def feed(self, data, final=False):
+        syntax = self.syntax
+        if self.utf8 is not None:
+            try:
+                self.utf8(data, final)
+            except UnicodeDecodeError as e:
+                raise self.error("Invalid UTF-8", len(self.pending) + e.start) from None
+        if self.pending:
+            data = self.pending + data
+        length = len(data)
+        if self.limits is not None:
+            self.check_size(length)
+        pos = 0
+        if self.parts is not None:
+            token, pos = self.string(data, 0, final)
+            if token is None:
+                self.carry(data, pos)
+                return
+            if self.stats is not None:
+                self.stats.tokens[token[0]] += 1
+            self.push(token, data, 0, pos)
+        if self.string_end and pos < length:
+            self.string_end = False
+            if not syntax.delimiter.match(data, pos):
+                raise self.error("Expected whitespace or an operator after string.  Got '{}'".format(
+                    syntax.char(data, pos)), pos)
+        match_token = syntax.token.match
+        constants = syntax.constants
+        slow_paths = self.slow_paths
+        elements, members = self.runs
+        backoff = self.backoff
+        objects = self.objects
+        state = self.state
+        max_depth = self.max_depth
+        max_members = self.max_members
+        counts = self.counts
+        run_depth = self.run_depth
+        stats = self.stats
+        tokens = None if stats is None else stats.tokens
+        try:
+            while True:
+                match = match_token(data, pos)
+                kind = match.lastindex
+                if kind == 1:
+                    token = constants[match.group(1)]
+                    value = token[1]
+                    if tokens is not None:
+                        tokens[token[0]] += 1
+                    if token[0] == TOKEN_TYPE.OPERATOR:
+                        pos = match.end()
+                        if value == "," and state == _BUILDER_STATE.ARRAY_NEXT:
+                            state = _BUILDER_STATE.ARRAY_VALUE
+                            run = elements
+                        elif value == "," and state == _BUILDER_STATE.OBJECT_NEXT:
+                            state = _BUILDER_STATE.OBJECT_KEY
+                            run = members
+                        elif value == ":" and state == _BUILDER_STATE.OBJECT_COLON:
+                            state = _BUILDER_STATE.OBJECT_VALUE
+                            continue
+                        elif (value == "[" or value == "{") and (state in _VALUE_STATES or
+                                                                 state == _BUILDER_STATE.VALUE):
+                            if max_depth is not None and len(objects) >= max_depth:
+                                raise self.error("Nesting is deeper than the limit of {}".format(max_depth),
+                                                 match.start(1))
+                            if value == "[":
+                                objects.append(False)
+                                state = _BUILDER_STATE.ARRAY_FIRST
+                                run = elements
                             else:
-                                raise ValueError("Object key expected.  Got '{}'".format(token))
-                        elif token_type == TOKEN_TYPE.STRING:
-                            stack.append(KVP(token))
-                        else:
-                            raise ValueError("Object keys must be strings.  Got '{}'".format(token))
-                    elif last_token == "}":
-                        value = stack.pop()
-                        if len(stack) == 0:
-                            return value, token_type, token
-                        if isinstance(stack[-1], list):
-                            stack[-1].append(value)
-                        elif isinstance(stack[-1], dict):
-                            stack[-1][value.key] = value.value
-                        elif isinstance(stack[-1], KVP):
-                            stack[-1].value = value
-                            stack[-1].set = True
-                            value = stack.pop()
-                            if len(stack) == 0:
-                                return value, token_type, token
-                            if isinstance(stack[-1], list):
-                                stack[-1].append(value)
-                            elif isinstance(stack[-1], dict):
-                                stack[-1][value.key] = value.value
+                                objects.append(True)
+                                state = _BUILDER_STATE.OBJECT_FIRST
+                                run = members
+                            if max_members is not None:
+                                counts.append(0)
+                            if stats is not None and len(objects) > stats.max_depth:
+                                stats.max_depth = len(objects)
+                        elif value == "]" and (state == _BUILDER_STATE.ARRAY_FIRST or
+                                               state == _BUILDER_STATE.ARRAY_NEXT) or \
+                                value == "}" and (state == _BUILDER_STATE.OBJECT_FIRST or
+                                                  state == _BUILDER_STATE.OBJECT_NEXT):
+                            objects.pop()
+                            if max_members is not None:
+                                counts.pop()
+                            if not objects:
+                                state = _BUILDER_STATE.DONE
                             else:
-                                raise ValueError("Object key value pairs must be followed by a comma or "
-                                                 "closing bracket.  Got '{}'".format(value))
-                    elif last_token == "]":
-                        raise ValueError("Object closed with a ']'")
-                    else:
-                        raise ValueError("Object key value pairs should be separated by comma, not ':'")
-            elif isinstance(stack[-1], KVP):
-                if stack[-1].set:
-                    if token_type == TOKEN_TYPE.OPERATOR:
-                        if token != "}" and token != ",":
-                            raise ValueError("Object key value pairs should be followed by ',' or '}'.  Got '"
-                                             + token + "'")
-                        value = stack.pop()
-                        if len(stack) == 0:
-                            return value, token_type, token
-                        if isinstance(stack[-1], list):
-                            stack[-1].append(value)
-                        elif isinstance(stack[-1], dict):
-                            stack[-1][value.key] = value.value
+                                state = _BUILDER_STATE.OBJECT_NEXT if objects[-1] else _BUILDER_STATE.ARRAY_NEXT
+                            continue
                         else:
-                            raise ValueError("Object key value pairs must be followed by a comma or closing bracket.  "
-                                             "Got '{}'".format(value))
-                        if token == "}" and len(stack) == 1:
-                            return stack[0], None, None
-                    else:
-                        raise ValueError("Object key value pairs should be followed by ',' or '}'.  Got '"
-                                         + token + "'")
-                else:
-                    if token_type == TOKEN_TYPE.OPERATOR and token == ":" and last_type == TOKEN_TYPE.STRING:
-                        pass
-                    elif last_type == TOKEN_TYPE.OPERATOR and last_token == ":":
-                        if token_type == TOKEN_TYPE.OPERATOR:
-                            if token == "{":
-                                stack.append({})
-                            elif token == "[":
-                                stack.append([])
+                            # the operator cannot come here, which push reports
+                            self.state = state
+                            self.push(token, data, match.start(1), pos)
+                            state = self.state
+                            continue
+                        if value == "," and max_members is not None:
+                            counts[-1] += 1
+                            if counts[-1] >= max_members:
+                                raise self.error("Container has more members than the limit of {}".format(
+                                    max_members), match.start(1))
+                        if run is not None:
+                            depth = len(objects)
+                            if run_depth is not None and depth > run_depth:
+                                continue
+                            if backoff.get(depth):
+                                backoff[depth] -= 1
+                                continue
+                            skipped = run(data, pos)
+                            if not skipped:
+                                backoff[depth] = _RUN_BACKOFF
                             else:
-                                raise ValueError("Object property value expected.  Got '{}'".format(token))
-                        else:
-                            stack[-1].value = token
-                            stack[-1].set = True
-                    else:
-                        raise ValueError("Object keys must be separated from values by a single ':'.  "
-                                         "Got '{}'".format(token))
-            else:
-                value = stack.pop()
-                if isinstance(stack[-1], list):
-                    stack[-1].append(value)
-                elif isinstance(stack[-1], dict):
-                    stack[-1][value.key] = value.value
+                                pos = skipped.end()
+                                if skipped.lastindex is None:
+                                    state = _BUILDER_STATE.OBJECT_KEY if objects[-1] else _BUILDER_STATE.ARRAY_VALUE
+                                    if max_members is not None:
+                                        counts[-1] += 1
+                                        if counts[-1] >= max_members:
+                                            raise self.error("Container has more members than the limit of {}".format(
+                                                max_members), pos - 1)
+                                else:
+                                    objects.pop()
+                                    if max_members is not None:
+                                        counts.pop()
+                                    if not objects:
+                                        state = _BUILDER_STATE.DONE
+                                    else:
+                                        state = _BUILDER_STATE.OBJECT_NEXT if objects[-1] else \
+                                            _BUILDER_STATE.ARRAY_NEXT
+                        continue
+                elif kind == 2:
+                    if tokens is not None:
+                        tokens[TOKEN_TYPE.STRING] += 1
+                    if state == _BUILDER_STATE.OBJECT_KEY or state == _BUILDER_STATE.OBJECT_FIRST:
+                        state = _BUILDER_STATE.OBJECT_COLON
+                        pos = match.end()
+                        continue
+                    token = TOKEN_TYPE.STRING, None
+                elif kind == 3 or kind == 4:
+                    if tokens is not None:
+                        tokens[TOKEN_TYPE.NUMBER] += 1
+                    token = TOKEN_TYPE.NUMBER, None
+                elif kind is None:
+                    pos = length
+                    break
                 else:
-                    raise ValueError("Array items must be followed by a comma or closing bracket.  "
-                                     "Got '{}'".format(value))
+                    start = match.start(kind)
+                    token, pos = slow_paths[kind](data, start, final)
+                    if token is None:
+                        break
+                    if tokens is not None:
+                        tokens[token[0]] += 1
+                    self.state = state
+                    self.push(token, data, start, pos)
+                    state = self.state
+                    continue
+                if state in _VALUE_STATES:
+                    state = _BUILDER_STATE.OBJECT_NEXT if objects[-1] else _BUILDER_STATE.ARRAY_NEXT
+                else:
+                    self.state = state
+                    self.push(token, data, match.start(kind), match.end())
+                    state = self.state
+                pos = match.end()
+        finally:
+            self.state = state
+        self.carry(data, pos)
 
-            last_type, last_token = token_type, token
-            token_type, token = next(token_stream)
-    except StopIteration as e:
-        if len(stack) == 1:
-            return stack[0], None, None
+    def close(self):
+        if self.state != _BUILDER_STATE.DONE:
+            raise ValueError("JSON Object not properly closed")
+        return True
+
+
+class IncrementalParser:
+    """
+    A push style parser for non-blocking I/O.  Input is handed over through feed as it arrives, in chunks of any size,
+    and the tokenizer and parser state is kept between calls.  feed returns the values completed by the new input: the
+    elements of the top level array when stream_array is True, or otherwise the root value once the document is
+    complete.  close must be called at the end of the input, and returns any values completed by it.
+    """
+
+    def __init__(self, stream_array=False, key_cache=None, limits=None, parse_int=None, parse_float=None):
+        self.key_cache = key_cache
+        self.limits = limits
+        self.numbers = _numbers(parse_int, parse_float)
+        self.elements = _ArrayElements(key_cache) if stream_array else None
+        self.tokenizer = None
+
+    def feed(self, data):
+        return self.push(data, False)
+
+    def close(self):
+        completed = self.push(self.tokenizer.syntax.empty if self.tokenizer else "", True)
+        if self.elements is None:
+            self.tokenizer.close()
         else:
-            raise ValueError("JSON Object not properly closed") from e
+            self.elements.close()
+        return completed
+
+    def push(self, data, final):
+        if self.tokenizer is None:
+            binary = not isinstance(data, str)
+            if self.elements is None:
+                self.tokenizer = _FusedParser(binary, self.key_cache, self.limits, self.numbers)
+            else:
+                self.tokenizer = _Tokenizer(binary, self.limits, self.numbers)
+        if self.elements is None:
+            done = self.tokenizer.done
+            self.tokenizer.feed(data, final)
+            return [self.tokenizer.value] if self.tokenizer.done and not done else []
+        completed = []
+        push = self.elements.push
+        for token in self.tokenizer.feed(data, final):
+            value = push(token)
+            if value is not _INCOMPLETE:
+                completed.append(value)
+        return completed
+
+
+@contextmanager
+def _map_file(path):
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def parse_file(path, key_cache=None, limits=None, parse_int=None, parse_float=None):
+    with _map_file(path) as buffer:
+        return parse(buffer, key_cache=key_cache, limits=limits, parse_int=parse_int, parse_float=parse_float)
+
+
+def stream_array_file(path, key_cache=None, limits=None, parse_int=None, parse_float=None):
+    with _map_file(path) as buffer:
+        yield from stream_array(tokenize(buffer, limits=limits, parse_int=parse_int, parse_float=parse_float),
+                                key_cache)
+
+
+def stream_documents(fp, key_cache=None, limits=None, parse_int=None, parse_float=None, buffer_size=None):
+    """
+    Yields each document of a stream of JSON documents as soon as it is complete.  fp is read in chunks of up to
+    buffer_size, which by default are large for binary streams and for text read from memory or a file on disk, and
+    a character at a time for other text streams, as everywhere else.
+    """
+    numbers = _numbers(parse_int, parse_float)
+    if _is_buffer(fp):
+        parser = _DocumentParser(True, key_cache, limits, numbers)
+        parser.feed(fp, True)
+        parser.close()
+        yield from parser.values
+        return
+    parser = None
+    for chunk in _read_chunks(fp, buffer_size):
+        if parser is None:
+            parser = _DocumentParser(not isinstance(chunk, str), key_cache, limits, numbers)
+        parser.feed(chunk)
+        if parser.values:
+            values, parser.values = parser.values, []
+            yield from values
+    if parser is None:
+        return
+    parser.feed(parser.syntax.empty, True)
+    parser.close()
+    yield from parser.values
+
+
+def validate(file, buffer_size=DEFAULT_BUFFER_SIZE, stats=None, limits=None):
+    """
+    Checks that file, a file like object or a document held in memory, holds a single well formed JSON document, as
+    parse would accept it, without building anything.  Returns True, or raises a ValueError with the index of the first
+    error.  Only the open containers are kept while checking, so memory use does not grow with the document.
+
+    With stats, every token is counted along with the input read and the deepest nesting, which is slower as runs of
+    data can no longer be skipped with a single match.
+    """
+    if stats is None:
+        return _validate(file, buffer_size, None, limits)
+    start = time.perf_counter()
+    try:
+        return _validate(file, buffer_size, stats, limits)
+    finally:
+        stats.elapsed += time.perf_counter() - start
+
+
+def _validate(file, buffer_size, stats, limits):
+    if isinstance(file, str) or _is_buffer(file):
+        if stats is not None:
+            stats.bytes += len(file)
+        # fed a slice at a time all the same, as a run over the whole of a large document is slower than over its slices
+        validator = _Validator(not isinstance(file, str), limits, stats)
+        for start in range(0, len(file), buffer_size):
+            validator.feed(file[start:start + buffer_size])
+        validator.feed(validator.syntax.empty, True)
+        return validator.close()
+    chunks = _read_chunks(file, buffer_size)
+    if stats is not None:
+        chunks = stats.read(chunks)
+    validator = None
+    for chunk in chunks:
+        if validator is None:
+            validator = _Validator(not isinstance(chunk, str), limits, stats)
+        validator.feed(chunk)
+    if validator is None:
+        validator = _Validator(False, limits, stats)
+    validator.feed(validator.syntax.empty, True)
+    return validator.close()
+
+
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+# containers nested up to this deep are matched by a single expression, and deeper ones are scanned a piece at a time
+_NESTED_DEPTH = 4
+
+
+def _nested(depth):
+    """
+    An expression matching a container holding containers at most depth deep, written so that it never backtracks.
+    """
+    inner = _STRING if not depth else _STRING + "|" + _nested(depth - 1)
+    body = r'[^"\[\]{{}}]*(?:(?:{0})[^"\[\]{{}}]*)*'.format(inner)
+    return r"\[{0}\]|\{{{0}\}}".format(body)
 
 
-def stream_array(token_stream):
+def _skips(binary):
+    """
+    Patterns for skipping over a container in raw input: whole containers up to _NESTED_DEPTH deep, a span of anything
+    but brackets and strings cut off by the end of the input, and the rest of a string cut off by the end of the input.
+    """
+    patterns = (_nested(_NESTED_DEPTH), r'(?:[^"\[\]{}]+|' + _STRING + r')*', r'[^"\\]*(?:\\.[^"\\]*)*')
+    if binary:
+        patterns = [pattern.encode("ascii") for pattern in patterns]
+    return tuple(re.compile(pattern, re.DOTALL).match for pattern in patterns)
 
-    def process_token(token_type, token):
+
+_SKIPS = {False: _skips(False), True: _skips(True)}
+# stands in for the tokens of a container skipped over in raw input
+_SKIPPED = (TOKEN_TYPE.OPERATOR, None)
+
+
+class _SkippingTokenizer(_Tokenizer):
+    """
+    A tokenizer that can skip over a container without tokenizing it.  Brackets and commas take the slow path, and
+    when skipping is set as the next value is asked for and that value is a container, only its brackets and strings
+    are scanned for and _SKIPPED is yielded in place of its tokens.  A scan cut off by the end of a chunk goes on
+    where the next one starts, as a string does.
+    """
+
+    def __init__(self, binary=False):
+        super().__init__(binary)
+        self.syntax = _STRUCTURE[binary]
+        self.slow_paths = self.slow_paths[:8] + (self.structure,)
+        self.skips = _SKIPS[binary]
+        self.skipping = False
+        self.closers = []
+        self.in_string = False
+
+    def structure(self, data, pos, final):
+        char = self.syntax.char(data, pos)
+        if char not in "[]{},":
+            return self.invalid(data, pos, final)
+        if self.skipping and (char == "[" or char == "{"):
+            self.skipping = False
+            nested = self.skips[0](data, pos)
+            if nested:
+                return _SKIPPED, nested.end()
+            self.closers.append("]" if char == "[" else "}")
+            return self.scan(data, pos + 1, final)
+        return (TOKEN_TYPE.OPERATOR, char), pos + 1
+
+    def string(self, data, pos, final):
+        if self.closers:
+            return self.scan(data, pos, final)
+        return _Tokenizer.string(self, data, pos, final)
+
+    def scan(self, data, pos, final):
+        nested, span, body = self.skips
+        closers = self.closers
+        quote = self.syntax.quote
+        length = len(data)
+        while True:
+            if self.in_string:
+                pos = body(data, pos).end()
+                if data[pos:pos + 1] != quote:
+                    break
+                self.in_string = False
+                pos += 1
+            pos = span(data, pos).end()
+            if pos >= length:
+                break
+            char = self.syntax.char(data, pos)
+            if char == '"':
+                self.in_string = True
+                pos += 1
+                continue
+            if char == "[" or char == "{":
+                match = nested(data, pos)
+                if match:
+                    pos = match.end()
+                    continue
+                closers.append("]" if char == "[" else "}")
+            elif closers.pop() != char:
+                raise self.error("Unexpected '{}'".format(char), pos)
+            pos += 1
+            if not closers:
+                self.parts = None
+                return _SKIPPED, pos
+        if final:
+            raise self.error("JSON Object not properly closed", length)
+        self.parts = _DISCARDED
+        return None, pos
+
+
+def _skipping_tokens(source):
+    """
+    Returns a _SkippingTokenizer reading source, a buffer or a file, with the stream of its tokens.
+    """
+    if _is_buffer(source):
+        tokenizer = _SkippingTokenizer(True)
+        return tokenizer, tokenizer.feed(source, True)
+    chunks = _read_chunks(source, None)
+    first = next(chunks, None)
+    tokenizer = _SkippingTokenizer(first is not None and not isinstance(first, str))
+
+    def tokens():
+        if first is not None:
+            yield from tokenizer.feed(first)
+            for chunk in chunks:
+                yield from tokenizer.feed(chunk)
+        yield from tokenizer.feed(tokenizer.syntax.empty, True)
+
+    return tokenizer, tokens()
+
+
+def _next_token(token_stream):
+    try:
+        return next(token_stream)
+    except StopIteration as e:
+        raise ValueError("JSON Object not properly closed") from e
+
+
+def _build(token_stream, token, key_cache):
+    builder = _ValueBuilder(key_cache)
+    value = builder.push(token)
+    while value is _INCOMPLETE:
+        value = builder.push(_next_token(token_stream))
+    return value
+
+
+def _skip(token_stream, token):
+    if token is _SKIPPED:
+        return
+    token_type, value = token
+    if token_type != TOKEN_TYPE.OPERATOR:
+        return
+    if value != "[" and value != "{":
+        raise ValueError("JSON value expected.  Got '{}'".format(value))
+    depth = 1
+    for token_type, value in token_stream:
         if token_type == TOKEN_TYPE.OPERATOR:
-            if token == ']':
-                return None, None, None
-            elif token == ",":
-                token_type, token = next(token_stream)
-                if token_type == TOKEN_TYPE.OPERATOR:
-                    if token == "[" or token == "{":
-                        return __parse(token_stream, (token_type, token))
-                    else:
-                        raise ValueError("Expected an array value.  Got '{}'".format(token))
-                else:
-                    return token, None, None
-            elif token == "[" or token == "{":
-                return __parse(token_stream, (token_type, token))
-            else:
-                raise ValueError("Array entries must be followed by ',' or ']'.  Got '{}'".format(token))
-        else:
-            return token, None, None
+            if value == "[" or value == "{":
+                depth += 1
+            elif value == "]" or value == "}":
+                depth -= 1
+                if not depth:
+                    return
+    raise ValueError("JSON Object not properly closed")
+
 
-    token_type, token = next(token_stream)
-    if token_type != TOKEN_TYPE.OPERATOR or token != '[':
-        raise ValueError("Array must start with '['.  Got '{}'".format(token))
+def _select(path, selectors):
+    """
+    Returns the names of the selectors matching the value at path, and the selectors that may match inside it.
+    """
+    depth = len(path)
+    matched = [name for name, segments in selectors if len(segments) == depth and
+               all(segment == "*" or segment == key for segment, key in zip(segments, path))]
+    if depth:
+        selectors = [(name, segments) for name, segments in selectors
+                     if len(segments) > depth and segments[depth - 1] in ("*", path[-1])]
+    return matched, selectors
 
-    token_type, token = next(token_stream)
-    while True:
-        while token is not None:
-            value, token_type, token  = process_token(token_type, token)
-            if value is None:
+
+def _next_value(token_stream, tokenizer, skip):
+    """
+    Returns the first token of the next value.  When the value is to be skipped and the tokenizer reads raw input, a
+    container is scanned over and comes back as _SKIPPED.
+    """
+    if tokenizer is None or not skip:
+        return _next_token(token_stream)
+    tokenizer.skipping = True
+    token = _next_token(token_stream)
+    tokenizer.skipping = False
+    return token
+
+
+def _walk(token_stream, token, path, matched, selectors, key_cache, tokenizer):
+    if matched:
+        value = _build(token_stream, token, key_cache)
+        for name in matched:
+            yield name, value
+        return
+    if not selectors:
+        _skip(token_stream, token)
+        return
+    token_type, value = token
+    if token_type != TOKEN_TYPE.OPERATOR:
+        return
+    if value == "[":
+        index = 0
+        child, inner = _select(path + ["0"], selectors)
+        token = _next_value(token_stream, tokenizer, not child and not inner)
+        if token == (TOKEN_TYPE.OPERATOR, "]"):
+            return
+        while True:
+            yield from _walk(token_stream, token, path + [str(index)], child, inner, key_cache, tokenizer)
+            index += 1
+            token_type, value = _next_token(token_stream)
+            if token_type == TOKEN_TYPE.OPERATOR and value == "]":
                 return
-            yield value
-        token_type, token = next(token_stream)
+            if token_type != TOKEN_TYPE.OPERATOR or value != ",":
+                raise ValueError("Array items must be followed by a comma or closing bracket.  Got '{}'".format(value))
+            child, inner = _select(path + [str(index)], selectors)
+            token = _next_value(token_stream, tokenizer, not child and not inner)
+    elif value == "{":
+        token_type, value = _next_token(token_stream)
+        if token_type == TOKEN_TYPE.OPERATOR and value == "}":
+            return
+        while True:
+            if token_type != TOKEN_TYPE.STRING:
+                raise ValueError("Object keys must be strings.  Got '{}'".format(value))
+            key = value
+            token_type, value = _next_token(token_stream)
+            if token_type != TOKEN_TYPE.OPERATOR or value != ":":
+                raise ValueError("Object keys must be separated from values by a single ':'.  Got '{}'".format(value))
+            child, inner = _select(path + [key], selectors)
+            token = _next_value(token_stream, tokenizer, not child and not inner)
+            yield from _walk(token_stream, token, path + [key], child, inner, key_cache, tokenizer)
+            token_type, value = _next_token(token_stream)
+            if token_type == TOKEN_TYPE.OPERATOR and value == "}":
+                return
+            if token_type != TOKEN_TYPE.OPERATOR or value != ",":
+                raise ValueError("Object key value pairs should be followed by ',' or '}}'.  Got '{}'".format(value))
+            token_type, value = _next_token(token_stream)
+    else:
+        raise ValueError("Expected object or array.  Got '{}'".format(value))
 
+
+def stream_path(token_stream, paths, key_cache=None):
+    """
+    Streams the values found at one or more paths through a document, each as soon as it is complete.  A path is a
+    string of object keys and array indices separated by dots, where "*" matches any key or index, so "data.items.*"
+    streams the elements of the items array inside the data object.  Subtrees that cannot contain a match are skipped
+    without building any values: in a file or buffer only their brackets and strings are scanned for, and in a stream
+    of tokens their tokens are counted through.
+
+    When paths is a single string, the matching values are yielded.  When it is a list of strings, (path, value)
+    pairs are yielded, so that the path each value matched is known.
+    """
+    tokenizer = None
+    if _is_buffer(token_stream) or hasattr(token_stream, "read"):
+        tokenizer, token_stream = _skipping_tokens(token_stream)
+    single = isinstance(paths, str)
+    selectors = [(path, tuple(path.split(".")) if path else ()) for path in ([paths] if single else paths)]
+    try:
+        token = next(token_stream)
+    except StopIteration as e:
+        raise ValueError("Expected object or array") from e
+    matched, selectors = _select([], selectors)
+    for name, value in _walk(token_stream, token, [], matched, selectors, key_cache, tokenizer):
+        yield value if single else (name, value)
+    for _ in token_stream:
+        raise ValueError("Additional string after end of JSON")
@@ -0,0 +1,269 @@
+import re
+from collections.abc import Mapping, Sequence
+
+from naya.json import _SKIPS, _STRING, _Tokenizer, _parse_value
+
+_OPEN_ARRAY, _CLOSE_ARRAY, _OPEN_OBJECT, _CLOSE_OBJECT, _COMMA, _COLON, _QUOTE = (ord(char) for char in '[]{},:"')
+
+
+def _patterns(binary):
+    """
+    The whitespace between tokens, a key with no escapes in it (group 1), any string, and a scalar other than a string,
+    compiled for str or for bytes.
+    """
+    patterns = (r"[ \t\n\r]*", r'"([^"\\]*)"', _STRING, r'[^ \t\n\r,:\[\]{}"]+')
+    if binary:
+        patterns = [pattern.encode("ascii") for pattern in patterns]
+    return tuple(re.compile(pattern, re.DOTALL).match for pattern in patterns)
+
+
+_PATTERNS = {False: _patterns(False), True: _patterns(True)}
+
+
+class _Document:
+    """
+    A document held in memory.  Containers are only split into their members when first accessed, and nested
+    containers are passed over by scanning for their brackets and strings alone.  The ends of containers too deep to
+    be matched in one go are kept in ends, so that each of them is only scanned once.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.binary = not isinstance(buffer, str)
+        self.whitespace, self.plain_key, self.string, self.scalar = _PATTERNS[self.binary]
+        self.nested, self.span, _ = _SKIPS[self.binary]
+        self.ends = {}
+
+    def code(self, pos):
+        """
+        The character at pos as a number, or -1 past the end.
+        """
+        if pos >= len(self.buffer):
+            return -1
+        char = self.buffer[pos]
+        return char if self.binary else ord(char)
+
+    def skip_whitespace(self, pos):
+        return self.whitespace(self.buffer, pos).end()
+
+    def end(self, pos):
+        """
+        Returns the offset just past the container opening at pos.  Only its brackets and strings are checked.
+        """
+        end = self.ends.get(pos)
+        if end is not None:
+            return end
+        buffer = self.buffer
+        closers = []
+        while True:
+            code = self.code(pos)
+            if code == _OPEN_ARRAY or code == _OPEN_OBJECT:
+                match = self.nested(buffer, pos)
+                if match:
+                    pos = match.end()
+                    if not closers:
+                        return pos
+                else:
+                    closers.append((code + 2, pos))
+                    pos += 1
+            else:
+                closer, opening = closers.pop()
+                if code != closer:
+                    raise ValueError("{} closed with a '{}' at index {}".format(
+                        "Array" if closer == _CLOSE_ARRAY else "Object", chr(code), pos))
+                pos += 1
+                self.ends[opening] = pos
+                if not closers:
+                    return pos
+            pos = self.span(buffer, pos).end()
+            if pos >= len(buffer):
+                raise ValueError("JSON Object not properly closed")
+            if self.code(pos) == _QUOTE:
+                raise ValueError("Unterminated string at index {}".format(pos))
+
+    def value_end(self, pos, expected):
+        """
+        Returns the offset just past the value starting at pos, with expected naming what should be there otherwise.
+        """
+        code = self.code(pos)
+        if code == _OPEN_ARRAY or code == _OPEN_OBJECT:
+            return self.end(pos)
+        if code == _QUOTE:
+            return self.string(self.buffer, pos).end()
+        match = self.scalar(self.buffer, pos)
+        if not match:
+            raise ValueError("{} expected at index {}".format(expected, pos))
+        return match.end()
+
+    def elements(self, start):
+        """
+        Returns the (start, stop) span of every element of the array opening at start.
+        """
+        elements = []
+        pos = self.skip_whitespace(start + 1)
+        if self.code(pos) == _CLOSE_ARRAY:
+            return elements
+        while True:
+            stop = self.value_end(pos, "Array value")
+            elements.append((pos, stop))
+            pos = self.skip_whitespace(stop)
+            code = self.code(pos)
+            if code == _CLOSE_ARRAY:
+                return elements
+            if code != _COMMA:
+                raise ValueError("Expected ',' or a closing bracket at index {}".format(pos))
+            pos = self.skip_whitespace(pos + 1)
+
+    def members(self, start):
+        """
+        Returns the keys of the object opening at start, along with the (start, stop) span of every value.  Keys
+        without escapes are decoded straight from the buffer.
+        """
+        keys = []
+        values = []
+        pos = self.skip_whitespace(start + 1)
+        if self.code(pos) == _CLOSE_OBJECT:
+            return keys, values
+        while True:
+            match = self.plain_key(self.buffer, pos)
+            if match:
+                key = match.group(1)
+                keys.append(bytes(key).decode("utf-8", "surrogatepass") if self.binary else key)
+            else:
+                match = self.string(self.buffer, pos)
+                if not match:
+                    raise ValueError("Object keys must be strings at index {}".format(pos))
+                keys.append(self.parse(pos, match.end()))
+            pos = self.skip_whitespace(match.end())
+            if self.code(pos) != _COLON:
+                raise ValueError("Object keys must be separated from values by a single ':' at index {}".format(pos))
+            pos = self.skip_whitespace(pos + 1)
+            stop = self.value_end(pos, "Object value")
+            values.append((pos, stop))
+            pos = self.skip_whitespace(stop)
+            code = self.code(pos)
+            if code == _CLOSE_OBJECT:
+                return keys, values
+            if code != _COMMA:
+                raise ValueError("Expected ',' or a closing bracket at index {}".format(pos))
+            pos = self.skip_whitespace(pos + 1)
+
+    def parse(self, start, stop):
+        tokenizer = _Tokenizer(self.binary)
+        tokenizer.index = start
+        return _parse_value(tokenizer.feed(self.buffer[start:stop], True))
+
+
+class _LazyContainer:
+
+    def __init__(self, document, start, stop):
+        self._document = document
+        self._start = start
+        self._stop = stop
+        self._members = None
+        self._values = None
+
+    def _value(self, position):
+        value = self._values[position]
+        if value is _UNPARSED:
+            start, stop = self._members[position]
+            code = self._document.code(start)
+            if code == _OPEN_ARRAY or code == _OPEN_OBJECT:
+                value = _lazy(self._document, start, stop)
+            else:
+                value = self._document.parse(start, stop)
+            self._values[position] = value
+        return value
+
+    def materialize(self):
+        return self._document.parse(self._start, self._stop)
+
+
+_UNPARSED = object()
+
+
+class LazyArray(_LazyContainer, Sequence):
+    """
+    A read only view of a JSON array that only parses each element the first time it is accessed.  Nested objects and
+    arrays are returned as further lazy views.  materialize parses the whole array into a list.
+    """
+
+    def _load(self):
+        if self._members is None:
+            self._members = self._document.elements(self._start)
+            self._values = [_UNPARSED] * len(self._members)
+
+    def __getitem__(self, item):
+        self._load()
+        if isinstance(item, slice):
+            return [self._value(position) for position in range(*item.indices(len(self._members)))]
+        if item < 0:
+            item += len(self._members)
+        if not 0 <= item < len(self._members):
+            raise IndexError("list index out of range")
+        return self._value(item)
+
+    def __len__(self):
+        self._load()
+        return len(self._members)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyArray)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return "LazyArray({!r})".format(list(self))
+
+
+class LazyObject(_LazyContainer, Mapping):
+    """
+    A read only view of a JSON object that only parses each value the first time it is accessed.  The keys are parsed
+    on first use, the values are not.  Nested objects and arrays are returned as further lazy views.  materialize
+    parses the whole object into a dict.
+    """
+
+    def _load(self):
+        if self._members is None:
+            keys, members = self._document.members(self._start)
+            self._members = members
+            self._values = [_UNPARSED] * len(members)
+            self._positions = {key: position for position, key in enumerate(keys)}
+
+    def __getitem__(self, key):
+        self._load()
+        return self._value(self._positions[key])
+
+    def __iter__(self):
+        self._load()
+        return iter(self._positions)
+
+    def __len__(self):
+        self._load()
+        return len(self._positions)
+
+    def __repr__(self):
+        return "LazyObject({!r})".format(dict(self))
+
+
+def _lazy(document, start, stop):
+    if document.code(start) == _OPEN_ARRAY:
+        return LazyArray(document, start, stop)
+    return LazyObject(document, start, stop)
+
+
+def parse_lazy(buffer):
+    """
+    Parses a document held in memory (a str, bytes, bytearray, memoryview or mmap) on demand.  A single scan checks the
+    brackets and strings of the document, and a LazyObject or LazyArray view of the root is returned, which only
+    splits containers and parses values as they are accessed.  Errors in a value are only reported once it is accessed.
+    """
+    document = _Document(buffer)
+    start = document.skip_whitespace(0)
+    code = document.code(start)
+    if code != _OPEN_ARRAY and code != _OPEN_OBJECT:
+        raise ValueError("Expected object or array")
+    stop = document.end(start)
+    if document.skip_whitespace(stop) != len(buffer):
+        raise ValueError("Additional string after end of JSON")
+    return _lazy(document, start, stop)
@@ -0,0 +1,269 @@
+import os
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from naya.json import DEFAULT_BUFFER_SIZE, _NESTED_DEPTH, _STRING, _DocumentParser, _FusedParser, _is_buffer, _nested, \
+    _read_chunks
+
+_STRUCTURE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(")?|([\[\]{},])', re.DOTALL)
+_BINARY_STRUCTURE = re.compile(_STRUCTURE.pattern.encode("ascii"), re.DOTALL)
+# as much of a member as can be passed over in one match: anything but brackets, commas and strings, whole strings, and
+# whole containers up to _NESTED_DEPTH deep, and the same taking in commas for inside the members
+_MEMBER = re.compile(r'(?:[^"\[\]{},]+|' + _STRING + "|" + _nested(_NESTED_DEPTH) + ")*", re.DOTALL)
+_BINARY_MEMBER = re.compile(_MEMBER.pattern.encode("ascii"), re.DOTALL)
+_INSIDE = re.compile(r'(?:[^"\[\]{}]+|' + _STRING + "|" + _nested(_NESTED_DEPTH) + ")*", re.DOTALL)
+_BINARY_INSIDE = re.compile(_INSIDE.pattern.encode("ascii"), re.DOTALL)
+_NON_WHITESPACE = re.compile(r"\S")
+_BINARY_NON_WHITESPACE = re.compile(rb"\S")
+_BRACKETS = {}
+for _char in "[]{},":
+    _BRACKETS[_char] = _BRACKETS[_char.encode("ascii")] = _char
+
+
+def _chunks(fp):
+    if _is_buffer(fp):
+        return [fp]
+    return _read_chunks(fp, DEFAULT_BUFFER_SIZE)
+
+
+def _split_members(chunks, roots):
+    """
+    Finds the members of a top level container without parsing them, tracking only the bracket depth and whether the
+    scan is inside a string.  Strings and containers up to _NESTED_DEPTH deep are passed over with a match each, and
+    only the brackets of containers nested deeper (or cut off by the end of a chunk) are counted one at a time.  The
+    container must open with one
+    of the characters in roots, which is yielded first.  After that, the absolute offset and the raw text of each array
+    element or object key value pair is yielded.
+    """
+    buffer = None
+    base = 0
+    scan = 0
+    start = None
+    depth = 0
+    count = 0
+    closed = False
+    for chunk in chunks:
+        if buffer is None:
+            buffer = chunk
+            binary = not isinstance(chunk, str)
+            structure = _BINARY_STRUCTURE if binary else _STRUCTURE
+            member = (_BINARY_MEMBER if binary else _MEMBER).match
+            inside = (_BINARY_INSIDE if binary else _INSIDE).match
+            non_whitespace = _BINARY_NON_WHITESPACE if binary else _NON_WHITESPACE
+        else:
+            keep = scan if start is None else start
+            buffer = buffer[keep:] + chunk
+            base += keep
+            scan -= keep
+            if start is not None:
+                start -= keep
+        if depth == 0:
+            first = non_whitespace.search(buffer, scan)
+            if first is None:
+                scan = len(buffer)
+                continue
+            if closed:
+                raise ValueError("Additional string after end of JSON at index {}".format(base + first.start()))
+            char = _text(buffer[first.start():first.end()])
+            if char not in roots:
+                if roots == "[":
+                    raise ValueError("Array must start with '['.  Got '{}' at index {}".format(
+                        char, base + first.start()))
+                raise ValueError("Expected object or array.  Got '{}' at index {}".format(char, base + first.start()))
+            closer = "]" if char == "[" else "}"
+            yield char
+            depth = 1
+            start = scan = first.end()
+        while True:
+            scan = (member if depth == 1 else inside)(buffer, scan).end()
+            match = structure.search(buffer, scan)
+            if match is None:
+                scan = len(buffer)
+                break
+            scan = match.end()
+            char = match.group(2)
+            if char is None:
+                if match.group(1) is None:
+                    scan = match.start()
+                    break
+                continue
+            char = _BRACKETS[char]
+            if depth == 1 and (char == "," or char == closer):
+                if non_whitespace.search(buffer, start, match.start()):
+                    element = buffer[start:match.start()]
+                    yield base + start, element if isinstance(element, (str, bytes)) else bytes(element)
+                    count += 1
+                elif char == "," or count:
+                    raise ValueError("{} expected at index {}".format(
+                        "Array value" if closer == "]" else "Object key", base + match.start()))
+                start = scan = match.end()
+                if char == closer:
+                    depth = 0
+                    closed = True
+                    start = None
+                    first = non_whitespace.search(buffer, scan)
+                    if first:
+                        raise ValueError("Additional string after end of JSON at index {}".format(
+                            base + first.start()))
+                    scan = len(buffer)
+                    break
+            elif char == "[" or char == "{":
+                depth += 1
+            elif char != ",":
+                if depth == 1:
+                    raise ValueError("{} closed with a '{}' at index {}".format(
+                        "Array" if closer == "]" else "Object", char, base + match.start()))
+                depth -= 1
+    if not closed:
+        raise ValueError("JSON Object not properly closed")
+
+
+def _split_lines(chunks, batch_size):
+    """
+    Cuts newline delimited input into blocks of whole lines of roughly batch_size, without looking at anything but
+    the newlines.  The absolute offset and the text of each block are yielded.
+    """
+    rest = None
+    base = 0
+    for chunk in chunks:
+        if isinstance(chunk, memoryview):
+            chunk = bytes(chunk)
+        newline = "\n" if isinstance(chunk, str) else b"\n"
+        if rest:
+            chunk = rest + chunk
+        start = 0
+        while len(chunk) - start > batch_size:
+            cut = chunk.find(newline, start + batch_size) + 1
+            if not cut:
+                break
+            yield base + start, chunk[start:cut]
+            start = cut
+        cut = chunk.rfind(newline, start) + 1
+        if cut:
+            yield base + start, chunk[start:cut]
+            start = cut
+        rest = chunk[start:]
+        base += start
+    if rest and rest.strip():
+        yield base, rest
+
+
+def _text(char):
+    return char if isinstance(char, str) else bytes(char).decode("utf-8", "replace")
+
+
+def _parse_batch(members, offsets, opener, closer):
+    """
+    Parses a batch of members of the root in a single pass, by joining them back up with the commas that separated
+    them into a container of their own.  The members of a batch are contiguous in the input, so counting from just
+    before the first of them gives errors the same index as in the whole input.
+    """
+    binary = not isinstance(members[0], str)
+    comma = ","
+    if binary:
+        opener, comma, closer = opener.encode("ascii"), b",", closer.encode("ascii")
+    parser = _FusedParser(binary)
+    parser.index = offsets[0] - 1
+    parser.feed(opener + comma.join(members) + closer, True)
+    return parser.close()
+
+
+def _parse_elements(elements, offsets):
+    return _parse_batch(elements, offsets, "[", "]")
+
+
+def _parse_members(members, offsets):
+    return _parse_batch(members, offsets, "{", "}")
+
+
+def _parse_documents(blocks, offsets):
+    values = []
+    for block, offset in zip(blocks, offsets):
+        parser = _DocumentParser(not isinstance(block, str))
+        parser.index = offset
+        parser.feed(block, True)
+        parser.close()
+        values.extend(parser.values)
+    return values
+
+
+def _collect(pending, ordered, block):
+    if ordered:
+        while pending and (block or pending[0].done()):
+            yield pending.popleft().result()
+            block = False
+    elif pending:
+        done, not_done = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        pending.clear()
+        pending.extend(not_done)
+        for future in done:
+            yield future.result()
+
+
+def _map_batches(executor, function, members, batch_size, max_pending, ordered):
+    pending = deque()
+    batch, offsets, size = [], [], 0
+    for offset, member in members:
+        batch.append(member)
+        offsets.append(offset)
+        size += len(member)
+        if size >= batch_size:
+            pending.append(executor.submit(function, batch, offsets))
+            batch, offsets, size = [], [], 0
+            yield from _collect(pending, ordered, len(pending) >= max_pending)
+    if batch:
+        pending.append(executor.submit(function, batch, offsets))
+    while pending:
+        yield from _collect(pending, ordered, True)
+
+
+def stream_array_parallel(fp, workers=None, ordered=True, batch_size=DEFAULT_BUFFER_SIZE, max_pending=None):
+    """
+    Streams the elements of a top level array like stream_array, but parses them in a pool of worker processes.  The
+    main process only splits the array into the raw text of its elements, which is sent to the workers in batches of
+    roughly batch_size characters.  At most max_pending batches (by default twice the number of workers) are in flight
+    at once.  With ordered set to False, elements are yielded in the order their batches complete.
+    """
+    workers = workers or os.cpu_count() or 1
+    members = _split_members(_chunks(fp), "[")
+    next(members, None)
+    with ProcessPoolExecutor(workers) as executor:
+        for values in _map_batches(executor, _parse_elements, members, batch_size, max_pending or 2 * workers,
+                                   ordered):
+            yield from values
+
+
+def parse_parallel(fp, workers=None, batch_size=DEFAULT_BUFFER_SIZE, max_pending=None):
+    """
+    Parses a document whose root is an array or an object like parse, but parses the members of the root in a pool of
+    worker processes and stitches them back together.  The arguments are the same as for stream_array_parallel.
+    """
+    workers = workers or os.cpu_count() or 1
+    members = _split_members(_chunks(fp), "[{")
+    root = next(members)
+    with ProcessPoolExecutor(workers) as executor:
+        if root == "[":
+            value = []
+            for values in _map_batches(executor, _parse_elements, members, batch_size, max_pending or 2 * workers,
+                                       True):
+                value.extend(values)
+        else:
+            value = {}
+            for values in _map_batches(executor, _parse_members, members, batch_size, max_pending or 2 * workers,
+                                       True):
+                value.update(values)
+    return value
+
+
+def stream_documents_parallel(fp, workers=None, ordered=True, batch_size=DEFAULT_BUFFER_SIZE, max_pending=None):
+    """
+    Streams the documents of newline delimited JSON like stream_documents, but parses them in a pool of worker
+    processes.  The input is only cut at newlines, into blocks of roughly batch_size characters, so every line must
+    hold whole documents.  The other arguments are the same as for stream_array_parallel.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        for values in _map_batches(executor, _parse_documents, _split_lines(_chunks(fp), batch_size), batch_size,
+                                   max_pending or 2 * workers, ordered):
+            yield from values
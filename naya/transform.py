@@ -0,0 +1,501 @@
+import re
+import sys
+
+from naya.json import DEFAULT_BUFFER_SIZE, _NESTED_DEPTH, _STRING, _DocumentParser, _is_buffer, _nested, _read_chunks, \
+    _unescape
+from naya.writer import _Writer, _is_binary
+
+_SCALAR = r'[^ \t\n\r,:\[\]{}"]+'
+_WHITESPACE = r"[ \t\n\r]*"
+
+
+class _Patterns:
+    """
+    The expressions used to scan raw input, compiled for str or for bytes.
+    """
+
+    def __init__(self, binary):
+        def compile(pattern):
+            return re.compile(pattern.encode("ascii") if binary else pattern, re.DOTALL)
+
+        self.binary = binary
+        self.whitespace = compile(_WHITESPACE)
+        self.body = compile(r'[^"\\]*(?:\\.[^"\\]*)*')
+        self.structure = compile(r'"[^"\\]*(?:\\.[^"\\]*)*(")?|([\[\]{}])')
+        self.scalar = compile(r'[^ \t\n\r,:\[\]{}"]*')
+        self.valid_scalar = compile(r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?|true|false|null")
+        self.nested = compile(_nested(_NESTED_DEPTH))
+        # a whole object member or array element, up to the following separator
+        value = "{}|{}|{}".format(_STRING, _SCALAR, _nested(_NESTED_DEPTH))
+        self.member = compile("{0}({1}){0}:{0}({2}){0}([,}}])".format(_WHITESPACE, _STRING, value))
+        self.element = compile("{0}({1}){0}([,\\]])".format(_WHITESPACE, value))
+        self.quote = self.text('"')
+        self.openers = (self.text("["), self.text("{"))
+        self.comma = self.text(",")
+        self.empty = self.text("")
+
+    def char(self, data, pos):
+        char = data[pos:pos + 1]
+        if not self.binary:
+            return char
+        return bytes(char).decode("latin-1")
+
+    def text(self, value):
+        return value.encode("utf-8") if self.binary else value
+
+    def key(self, raw):
+        key = raw[1:-1]
+        if self.binary:
+            key = bytes(key).decode("utf-8", "surrogatepass")
+        return _unescape(key) if "\\" in key else key
+
+
+_TEXT = _Patterns(False)
+_BINARY = _Patterns(True)
+_CLOSERS = {"[": "]", "{": "}"}
+
+
+class _Drop:
+
+    def __repr__(self):
+        return "DROP"
+
+
+DROP = _Drop()
+
+
+class Rename:
+    """
+    A transform rule that writes an object member under a new key.  Rules for paths inside its value still apply, and
+    are given the original key.
+    """
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+
+def _piece(data):
+    return data if isinstance(data, (str, bytes)) else bytes(data)
+
+
+class _Input:
+    """
+    A window onto raw input read in chunks.  The text from start to pos has been scanned and is to be kept, but has
+    not been written out yet.  Everything from start on is kept when the next chunk is read, so absolute positions
+    (offsets from index) after start stay valid.
+    """
+
+    def __init__(self, chunks, output):
+        self.chunks = iter(chunks)
+        data = next(self.chunks, "")
+        self.patterns = _TEXT if isinstance(data, str) else _BINARY
+        self.data = data
+        self.index = 0
+        self.start = 0
+        self.pos = 0
+        self.output = output
+
+    def error(self, message, pos=None):
+        return ValueError("{} at index {}".format(message, self.index + (self.pos if pos is None else pos)))
+
+    def copy(self, end):
+        """
+        Writes out the kept text up to end.
+        """
+        if end > self.start:
+            self.output.raw(_piece(self.data[self.start:end]))
+        self.start = end
+
+    def more(self):
+        """
+        Appends the next chunk, discarding everything before start.  Returns False at the end of the input.
+        """
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            return False
+        self.index += self.start
+        self.pos -= self.start
+        self.data = _piece(self.data[self.start:]) + _piece(chunk)
+        self.start = 0
+        return True
+
+    def peek(self):
+        """
+        Skips whitespace, and returns the next character, or None at the end of the input.
+        """
+        whitespace = self.patterns.whitespace
+        while True:
+            self.pos = whitespace.match(self.data, self.pos).end()
+            if self.pos < len(self.data):
+                return self.patterns.char(self.data, self.pos)
+            if not self.more():
+                return None
+
+    def key(self):
+        """
+        Reads an object key and the colon after it, returning the key and the absolute position of its start and end.
+        """
+        char = self.peek()
+        if char != '"':
+            raise self.error("Object keys must be strings.  Got '{}'".format(char))
+        start = self.index + self.pos
+        self.pos += 1
+        self.string(None)
+        key = self.patterns.key(self.data[start - self.index:self.pos])
+        end = self.index + self.pos
+        char = self.peek()
+        if char != ":":
+            raise self.error("Object keys must be separated from values by a single ':'.  Got '{}'".format(char))
+        self.pos += 1
+        return key, start, end
+
+    def value(self, sink):
+        """
+        Scans the value at pos.  When sink is True it is kept, and the kept text is written out whenever a chunk has
+        to be read.  When sink is False it is dropped, along with anything before it that has not been written out,
+        and otherwise each piece of it is passed to sink.  Only the brackets and strings of containers are checked,
+        to find where they end.
+        """
+        char = self.peek()
+        if sink is not True:
+            self.start = self.pos
+        if char == '"':
+            self.pos += 1
+            self.string(sink)
+        elif char == "[" or char == "{":
+            self.container(sink)
+        elif char is None:
+            raise self.error("Expected a value")
+        else:
+            self.scalar()
+        if sink is not True:
+            self.release(sink)
+
+    def release(self, sink):
+        """
+        Disposes of the text scanned so far before a chunk is read, so that a long value is never held in memory.
+        None leaves it in place.
+        """
+        if sink is True:
+            self.copy(self.pos)
+        elif sink is not None:
+            if sink is not False and self.pos > self.start:
+                sink(_piece(self.data[self.start:self.pos]))
+            self.start = self.pos
+
+    def string(self, sink):
+        """
+        Scans the rest of a string, from just after its opening quote.
+        """
+        body = self.patterns.body
+        quote = self.patterns.quote
+        while True:
+            end = body.match(self.data, self.pos).end()
+            if self.data[end:end + 1] == quote:
+                self.pos = end + 1
+                return
+            self.pos = end
+            self.release(sink)
+            if not self.more():
+                raise self.error("Unterminated string")
+
+    def container(self, sink):
+        structure = self.patterns.structure
+        char = self.patterns.char
+        match = self.patterns.nested.match(self.data, self.pos)
+        if match is not None:
+            self.pos = match.end()
+            return
+        closers = []
+        while True:
+            for match in structure.finditer(self.data, self.pos):
+                if match.group(2) is not None:
+                    bracket = char(self.data, match.start(2))
+                    if bracket in _CLOSERS:
+                        closers.append(_CLOSERS[bracket])
+                    elif not closers or closers.pop() != bracket:
+                        raise self.error("Unexpected '{}'".format(bracket), match.start(2))
+                    if not closers:
+                        self.pos = match.end()
+                        return
+                elif match.group(1) is None:
+                    self.pos = match.start() + 1
+                    self.string(sink)
+                    break
+            else:
+                self.pos = len(self.data)
+                self.release(sink)
+                if not self.more():
+                    raise self.error("JSON Object not properly closed")
+
+    def scalar(self):
+        scalar = self.patterns.scalar
+        while True:
+            end = scalar.match(self.data, self.pos).end()
+            if end < len(self.data) or not self.more():
+                break
+        self.check_scalar(self.pos, end)
+        self.pos = end
+
+    def check_scalar(self, start, end):
+        if not self.patterns.valid_scalar.fullmatch(self.data, start, end):
+            raise self.error("JSON value expected.  Got '{}'".format(
+                self.patterns.char(self.data, start) if end == start else self.data[start:end]), start)
+
+
+class _Output:
+    """
+    Collects raw pieces of input, in the input's type, alongside encoded values, and writes them out in chunks of
+    about buffer_size characters.
+    """
+
+    def __init__(self, fp, buffer_size, patterns):
+        self.fp = fp
+        self.binary = _is_binary(fp)
+        self.buffer_size = buffer_size
+        self.patterns = patterns
+        self.encoder = _Writer(None, sys.maxsize)
+        self.pieces = []
+        self.size = 0
+
+    def raw(self, piece):
+        self.pieces.append(piece)
+        self.size += len(piece)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def encode(self, value):
+        encoder = self.encoder
+        encoder.write(value)
+        text = "".join(encoder.pieces)
+        encoder.pieces = []
+        return self.patterns.text(text)
+
+    def encoded(self, value):
+        self.raw(self.encode(value))
+
+    def flush(self):
+        if self.pieces:
+            data = self.patterns.empty.join(self.pieces)
+            self.pieces = []
+            self.size = 0
+            if self.patterns.binary != self.binary:
+                data = data.encode("utf-8") if self.binary else data.decode("utf-8", "surrogatepass")
+            self.fp.write(data)
+
+
+class _Level:
+    """
+    The rules for the members of one container, found from the selectors that reached it.  An exact key or index wins
+    over "*".
+    """
+
+    def __init__(self, selectors, depth):
+        self.selectors = selectors
+        self.depth = depth
+        self.rules = {}
+        self.any_rule = None
+        self.inner_keys = set()
+        self.any_inner = False
+        self.children = {}
+        self.constants = {}
+        for rule, segments in selectors:
+            key = segments[depth]
+            if len(segments) > depth + 1:
+                if key == "*":
+                    self.any_inner = True
+                else:
+                    self.inner_keys.add(key)
+            elif key == "*":
+                if self.any_rule is None:
+                    self.any_rule = rule
+            else:
+                self.rules.setdefault(key, rule)
+        self.keyed = bool(self.rules or self.inner_keys)
+
+    def rule(self, key):
+        return self.rules.get(key, self.any_rule)
+
+    def encoded(self, rule, output):
+        """
+        The text of a constant rule, encoded once.
+        """
+        text = self.constants.get(id(rule))
+        if text is None:
+            text = self.constants[id(rule)] = output.encode(rule)
+        return text
+
+    def child(self, key):
+        """
+        The level for the members of the value at key, or None if no rule reaches inside it.
+        """
+        if key not in self.inner_keys:
+            if not self.any_inner:
+                return None
+            key = "*"
+        level = self.children.get(key)
+        if level is None:
+            depth = self.depth
+            selectors = [(rule, segments) for rule, segments in self.selectors
+                         if len(segments) > depth + 1 and segments[depth] in ("*", key)]
+            level = self.children[key] = _Level(selectors, depth + 1)
+        return level
+
+
+def _parse_raw(source):
+    pieces = []
+    source.value(pieces.append)
+    parser = _DocumentParser(source.patterns.binary)
+    parser.feed(source.patterns.empty.join(pieces), True)
+    parser.close()
+    return parser.values[0]
+
+
+def _apply(source, rule, begin, value_start):
+    """
+    Replaces the value at pos according to rule.  begin is the absolute position of the member's comma, or of its
+    start if it is to be the first member kept, and nothing has been written out past it.  Returns whether the member
+    was kept.
+    """
+    head = _piece(source.data[begin - source.index:value_start - source.index])
+    if callable(rule):
+        value = rule(_parse_raw(source))
+    else:
+        source.value(False)
+        value = rule
+    source.start = source.pos
+    if value is DROP:
+        return False
+    source.output.raw(head)
+    source.output.encoded(value)
+    return True
+
+
+def _walk(source, level):
+    """
+    Scans the value at pos, keeping it, and walking into it only as far as it contains a path that a rule applies to.
+    """
+    char = source.peek()
+    if level is None or (char != "[" and char != "{"):
+        source.value(True)
+        return
+    patterns = source.patterns
+    is_object = char == "{"
+    closer = "}" if is_object else "]"
+    fast = patterns.member if is_object else patterns.element
+    fast_end = patterns.text(closer)
+    source.pos += 1
+    if source.peek() == closer:
+        source.pos += 1
+        return
+    index = 0
+    # the absolute position of the comma before the current member, once any member has been kept
+    separator = None
+    while True:
+        # members that no rule applies to, in or below them, are kept with a single match
+        if not is_object and level.any_inner and source.peek() in ("[", "{"):
+            match = None
+        else:
+            match = fast.match(source.data, source.pos)
+        if match is not None:
+            if is_object:
+                key = patterns.key(match.group(1))
+            else:
+                key = str(index) if level.keyed else "*"
+            rule = level.rule(key)
+            group = match.lastindex - 1
+            value_start = match.start(group)
+            first = source.data[value_start:value_start + 1]
+            walk = rule is not None and (callable(rule) or isinstance(rule, Rename))
+            if first in patterns.openers:
+                walk = walk or rule is None and level.child(key) is not None
+            elif first != patterns.quote:
+                source.check_scalar(value_start, match.end(group))
+            if not walk:
+                if rule is DROP:
+                    if separator is None:
+                        source.copy(source.pos)
+                        source.start = match.end() if match.group(group + 1) == patterns.comma else match.end() - 1
+                    else:
+                        source.copy(separator - source.index)
+                        source.start = match.end(group)
+                elif rule is not None:
+                    source.copy(value_start)
+                    source.output.raw(level.encoded(rule, source.output))
+                    source.start = match.end(group)
+                source.pos = match.end()
+                if match.group(group + 1) == fast_end:
+                    return
+                if rule is not DROP or separator is not None:
+                    separator = source.index + source.pos - 1
+                index += 1
+                continue
+        begin = source.index + source.pos if separator is None else separator
+        source.copy(begin - source.index)
+        if is_object:
+            key, key_start, key_end = source.key()
+        else:
+            key = str(index)
+        source.peek()
+        value_start = source.index + source.pos
+        rule = level.rule(key)
+        if rule is None:
+            _walk(source, level.child(key))
+            kept = True
+        elif rule is DROP:
+            source.value(False)
+            kept = False
+        elif isinstance(rule, Rename):
+            if not is_object:
+                raise source.error("Only object members can be renamed")
+            source.copy(key_start - source.index)
+            source.output.encoded(rule.key)
+            source.start = key_end - source.index
+            _walk(source, level.child(key))
+            kept = True
+        else:
+            kept = _apply(source, rule, begin, value_start)
+        index += 1
+        found = source.peek()
+        if kept or separator is not None:
+            separator = source.index + source.pos
+        elif found == ",":
+            source.start = source.pos + 1
+        source.pos += 1
+        if found == closer:
+            return
+        if found != ",":
+            source.pos -= 1
+            if is_object:
+                raise source.error("Object key value pairs should be followed by ',' or '}}'.  Got '{}'".format(found))
+            raise source.error("Array items must be followed by a comma or closing bracket.  Got '{}'".format(found))
+
+
+def transform(source, fp, rules, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Copies a document from source to the file like object fp, applying rules to the values at the paths given.  rules
+    maps paths, written as for stream_path, to what should become of the value there:
+
+    * DROP removes the object member or array element
+    * Rename(key) writes the object member under a new key
+    * a callable is given the value, and returns the value to write in its place (or DROP)
+    * anything else is written in place of the value
+
+    Only the containers that hold a path in the rules are walked.  Everything else is copied from the input as it is
+    written, without building any values, and with only the brackets and strings checked.  Where several rules apply
+    to a value, the one for the shortest path wins, and an exact key or index wins over "*".
+    """
+    selectors = [(rule, tuple(path.split(".")) if path else ()) for path, rule in rules.items()]
+    chunks = [source] if _is_buffer(source) or isinstance(source, str) else _read_chunks(source, buffer_size)
+    source = _Input(chunks, None)
+    source.output = _Output(fp, buffer_size, source.patterns)
+    root = next((rule for rule, segments in selectors if not segments), None)
+    if root is None:
+        _walk(source, _Level(selectors, 0) if selectors else None)
+    elif root is DROP or isinstance(root, Rename) or not _apply(source, root, 0, 0):
+        raise ValueError("The root of a document cannot be dropped or renamed")
+    if source.peek() is not None:
+        raise source.error("Additional string after end of JSON")
+    source.copy(source.pos)
+    source.output.flush()
@@ -0,0 +1,319 @@
+import re
+from collections.abc import Mapping
+from decimal import Decimal
+from itertools import chain, islice
+from io import BufferedIOBase, RawIOBase
+from json.encoder import encode_basestring
+
+from naya.json import DEFAULT_BUFFER_SIZE, RawNumber
+
+try:
+    from json.encoder import c_make_encoder
+except ImportError:
+    c_make_encoder = None
+
+_END = object()
+_INFINITY = float("inf")
+# lists, tuples and dicts with up to this many members are encoded in one go, and longer ones a member at a time
+_MAX_ENCODED = 1024
+# the members of walked arrays are read and encoded this many at a time
+_BATCH = 64
+_SCALARS = frozenset((str, int, float, bool, type(None), RawNumber))
+_CONTAINERS = frozenset((dict, list, tuple))
+# the markers _string puts around a RawNumber, and the text following a marked key
+_RAW_START = "\x00"
+_RAW_END = "\x01"
+_RAW_KEY = _RAW_END + ":"
+_MARKED_KEY = re.compile("\x00([^\x01]*)\x01:")
+
+
+def _is_binary(fp):
+    return isinstance(fp, (RawIOBase, BufferedIOBase)) or "b" in getattr(fp, "mode", "")
+
+
+def _number(value):
+    """
+    The text of a float or Decimal, which must be finite, as JSON has no way of writing anything else.
+    """
+    if isinstance(value, Decimal):
+        if not value.is_finite():
+            raise ValueError("Out of range values are not JSON compliant.  Got '{}'".format(value))
+        return str(value)
+    if value != value or value == _INFINITY or value == -_INFINITY:
+        raise ValueError("Out of range values are not JSON compliant.  Got '{}'".format(value))
+    return float.__repr__(value)
+
+
+def _key(key):
+    if isinstance(key, str):
+        return encode_basestring(key)
+    if key is True:
+        return '"true"'
+    if key is False:
+        return '"false"'
+    if key is None:
+        return '"null"'
+    if isinstance(key, int):
+        return '"' + int.__repr__(key) + '"'
+    if isinstance(key, (float, Decimal)):
+        return '"' + _number(key) + '"'
+    raise TypeError("Object keys must be str, int, float, bool or None.  Got {!r}".format(key))
+
+
+def _string(value):
+    """
+    Encodes strings for the C encoder, which also calls it for keys.  RawNumber is marked rather than written as is,
+    so that _unmark can tell keys, which must still be quoted, from values.
+    """
+    return _RAW_START + value + _RAW_END if type(value) is RawNumber else encode_basestring(value)
+
+
+def _unmark(text):
+    """
+    Writes out the RawNumbers marked by _string in text encoded by the C encoder.  The markers are control characters,
+    which the encoder never writes unescaped, and a marked key is the only thing followed by the key separator.
+    """
+    if _RAW_END not in text:
+        return text
+    if _RAW_KEY not in text:
+        return text.replace(_RAW_START, "").replace(_RAW_END, "")
+    return _MARKED_KEY.sub(r'"\1":', text).replace(_RAW_START, "").replace(_RAW_END, "")
+
+
+def _default(value):
+    """
+    Converts the values the C encoder does not know into ones it does.  Iterables nested inside a value that is
+    encoded in one go are read into lists, as the value is being held in memory anyway.
+    """
+    if isinstance(value, Decimal):
+        return RawNumber(_number(value))
+    if isinstance(value, Mapping):
+        return dict(value.items())
+    if not isinstance(value, (bytes, bytearray, memoryview)):
+        try:
+            return list(value)
+        except TypeError:
+            pass
+    raise TypeError("Object of type {} is not JSON serializable".format(type(value).__name__))
+
+
+def _encodable(batch):
+    """
+    The number of leading items of batch that can be handed to the C encoder together.
+    """
+    for index, item in enumerate(batch):
+        item_type = type(item)
+        if item_type not in _SCALARS and (item_type not in _CONTAINERS or len(item) > _MAX_ENCODED):
+            return index
+    return len(batch)
+
+
+def _make_encoder():
+    if c_make_encoder is None:
+        return None
+    return c_make_encoder({}, _default, _string, None, ":", ",", False, False, False)
+
+
+class _Writer:
+    """
+    Encodes values into a list of pieces, which is joined and written out once it holds about buffer_size characters.
+    Small lists and dicts are encoded by the json module's C encoder, with RawNumber written as is.  Anything larger,
+    and any iterable other than a str, bytes, list, tuple or dict, is walked with an explicit stack and written a
+    member at a time, so generators (such as stream_array) are never held in memory.
+    """
+
+    def __init__(self, fp, buffer_size):
+        self.fp = fp
+        self.binary = _is_binary(fp)
+        self.buffer_size = buffer_size
+        self.encode = _make_encoder()
+        self.pieces = []
+        self.size = 0
+
+    def flush(self):
+        if self.pieces:
+            text = "".join(self.pieces)
+            self.pieces = []
+            self.size = 0
+            self.fp.write(text.encode("utf-8") if self.binary else text)
+
+    def write(self, value):
+        pieces = self.pieces
+        append = pieces.append
+        buffer_size = self.buffer_size
+        encode = self.encode
+        # pieces other than strings and encoded containers are rarely more than a few characters, so are not measured
+        limit = len(pieces) + buffer_size // 8
+        size = self.size
+        stack = []
+        walking = set()
+        while True:
+            value_type = type(value)
+            if value_type is str:
+                text = encode_basestring(value)
+                size += len(text)
+                append(text)
+            elif value is None:
+                append("null")
+            elif value is True:
+                append("true")
+            elif value is False:
+                append("false")
+            elif value_type is int:
+                append(int.__repr__(value))
+            elif value_type is float:
+                append(_number(value))
+            elif value_type is RawNumber:
+                append(value)
+            elif encode is not None and value_type in (dict, list, tuple) and len(value) <= _MAX_ENCODED:
+                text = _unmark("".join(encode(value, 0)))
+                size += len(text)
+                append(text)
+            elif isinstance(value, str):
+                text = encode_basestring(value)
+                size += len(text)
+                append(text)
+            elif isinstance(value, int):
+                append(int.__repr__(value))
+            elif isinstance(value, (float, Decimal)):
+                append(_number(value))
+            elif isinstance(value, (bytes, bytearray, memoryview)):
+                raise TypeError("Object of type {} is not JSON serializable".format(value_type.__name__))
+            else:
+                if id(value) in walking:
+                    raise ValueError("Circular reference detected")
+                if isinstance(value, Mapping):
+                    items = iter(value.items())
+                    item = next(items, _END)
+                    if item is _END:
+                        append("{}")
+                    else:
+                        append("{")
+                        append(_key(item[0]))
+                        append(":")
+                        walking.add(id(value))
+                        stack.append((value, items, True))
+                        value = item[1]
+                        continue
+                else:
+                    try:
+                        items = iter(value)
+                    except TypeError:
+                        raise TypeError("Object of type {} is not JSON serializable".format(
+                            value_type.__name__)) from None
+                    item = next(items, _END)
+                    if item is _END:
+                        append("[]")
+                    else:
+                        append("[")
+                        walking.add(id(value))
+                        stack.append((value, items, False))
+                        value = item
+                        continue
+            # the value is complete, so move on to the next member of the innermost unfinished container
+            while stack:
+                if size >= buffer_size or len(pieces) >= limit:
+                    self.size = size
+                    self.flush()
+                    pieces = self.pieces
+                    append = pieces.append
+                    limit = buffer_size // 8
+                    size = 0
+                container, items, is_object = stack[-1]
+                if encode is not None and not is_object:
+                    batch = list(islice(items, _BATCH))
+                    count = _encodable(batch)
+                    if count:
+                        text = _unmark("".join(encode(batch if count == len(batch) else batch[:count], 0)))
+                        size += len(text) - 2
+                        append(",")
+                        append(text[1:-1])
+                    if count < len(batch):
+                        stack[-1] = (container, chain(batch[count + 1:], items), False)
+                        append(",")
+                        value = batch[count]
+                        break
+                    if batch:
+                        continue
+                    item = _END
+                else:
+                    item = next(items, _END)
+                if item is not _END:
+                    append(",")
+                    if is_object:
+                        append(_key(item[0]))
+                        append(":")
+                        value = item[1]
+                    else:
+                        value = item
+                    break
+                append("}" if is_object else "]")
+                walking.discard(id(container))
+                stack.pop()
+            else:
+                self.size = size
+                if size >= buffer_size or len(pieces) >= limit:
+                    self.flush()
+                return
+
+
+def dump(obj, fp, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Writes obj to the file like object fp as JSON, in writes of about buffer_size characters.  Besides the types the
+    json module accepts, any mapping is written as an object and any other iterable as an array, iterating over it as
+    it is written, so a generator of records is never held in memory.  RawNumber is written as is and Decimal in full.
+    Binary files are written UTF-8 encoded.
+    """
+    writer = _Writer(fp, buffer_size)
+    writer.write(obj)
+    writer.flush()
+
+
+class StreamArrayWriter:
+    """
+    Writes a JSON array to the file like object fp one element at a time, for when the elements are produced by the
+    program rather than a generator that could be passed to dump.  Elements are encoded as they are written, and the
+    output is written to fp in chunks of about buffer_size characters.  close, or leaving a with block without an
+    exception, writes the closing bracket, but does not close fp.
+    """
+
+    def __init__(self, fp, buffer_size=DEFAULT_BUFFER_SIZE):
+        self._writer = _Writer(fp, buffer_size)
+        self._writer.pieces.append("[")
+        self._empty = True
+        self.closed = False
+
+    def write(self, item):
+        if self.closed:
+            raise ValueError("Cannot write to a closed StreamArrayWriter")
+        if self._empty:
+            self._empty = False
+        else:
+            self._writer.pieces.append(",")
+        self._writer.write(item)
+
+    def write_all(self, items):
+        for item in items:
+            self.write(item)
+
+    def flush(self):
+        """
+        Writes out everything buffered so far, and flushes fp if it can be.
+        """
+        self._writer.flush()
+        flush = getattr(self._writer.fp, "flush", None)
+        if flush is not None:
+            flush()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._writer.pieces.append("]")
+            self._writer.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
@@ -22,5 +22,6 @@ setup(
         'Topic :: Text Processing :: Markup'
     ],
     keywords='json streaming python',
-    packages=['naya']
+    packages=['naya'],
+    extras_require={'numpy': ['numpy']}
 )
@@ -0,0 +1,60 @@
+import asyncio
+import json
+import unittest
+from naya.aio import async_stream_array, async_tokenize
+
+
+class ChunkReader:
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    async def read(self, n):
+        await asyncio.sleep(0)
+        return self.chunks.pop(0) if self.chunks else self.chunks[:0]
+
+
+def collect(iterator):
+    async def run():
+        return [item async for item in iterator]
+    return asyncio.run(run())
+
+
+class TestAsyncStreaming(unittest.TestCase):
+
+    def test_tokenize(self):
+        result = collect(async_tokenize(ChunkReader(['123 "a', 'bc":{', '}'])))
+        self.assertEqual(result, [(2, 123), (1, 'abc'), (0, ':'), (0, '{'), (0, '}')])
+
+    def test_stream_array(self):
+        text = '[{"key1": "välue1"}, "Places", [0, 1, 2], null, 5, {"a": [{}]}]'
+        expected = json.loads(text)
+        data = text.encode("utf-8")
+        for size in (1, 3, 100):
+            chunks = [data[i:i + size] for i in range(0, len(data), size)]
+            self.assertListEqual(collect(async_stream_array(ChunkReader(chunks))), expected)
+
+    def test_stream_reader(self):
+        async def run():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'["Apples", {"key": "value"}')
+            reader.feed_data(b', "Bananas"]')
+            reader.feed_eof()
+            return [item async for item in async_stream_array(reader)]
+        self.assertListEqual(asyncio.run(run()), ["Apples", {"key": "value"}, "Bananas"])
+
+    def test_items_arrive_before_the_end(self):
+        async def run():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'["first", {"second": 2}, ')
+            items = async_stream_array(reader)
+            first = await items.__anext__()
+            second = await items.__anext__()
+            reader.feed_data(b'3]')
+            reader.feed_eof()
+            return [first, second] + [item async for item in items]
+        self.assertListEqual(asyncio.run(run()), ["first", {"second": 2}, 3])
+
+    def test_errors(self):
+        for text in ('{"a": 1}', '["a" "b"]', '[1,]', '[1, 2', '[1] 2', '[,1]', '[1}]'):
+            self.assertRaises(ValueError, collect, async_stream_array(ChunkReader([text])))
@@ -0,0 +1,51 @@
+import math
+import unittest
+from array import array
+from io import BytesIO, StringIO
+from naya.columns import numpy, stream_array_columns
+
+
+class TestStreamArrayColumns(unittest.TestCase):
+
+    records = '[{"id": 1, "price": 2.5, "name": "first", "active": true, "extra": {"x": [1, 2]}, "tags": ["a"]}, ' \
+              '{"price": null, "id": 2, "name": null, "active": false, "tags": null}, ' \
+              '{"id": 3, "active": true, "price": 4}]'
+    schema = {"id": "q", "price": "d", "name": str, "active": bool, "tags": object}
+
+    def test_columns(self):
+        for fp in (StringIO(self.records), BytesIO(self.records.encode("utf-8")), self.records.encode("utf-8")):
+            batches = [batch for batch in stream_array_columns(fp, self.schema, batch_size=2)]
+            self.assertEqual(len(batches), 2)
+            first, second = batches
+            self.assertEqual(first["id"], array("q", [1, 2]))
+            self.assertEqual(first["price"][0], 2.5)
+            self.assertTrue(math.isnan(first["price"][1]))
+            self.assertListEqual(first["name"], ["first", None])
+            self.assertEqual(first["active"], array("b", [1, 0]))
+            self.assertListEqual(first["tags"], [["a"], None])
+            self.assertEqual(second["id"], array("q", [3]))
+            self.assertEqual(second["price"], array("d", [4.0]))
+            self.assertListEqual(second["name"], [None])
+
+    def test_empty_and_duplicates(self):
+        self.assertListEqual([batch for batch in stream_array_columns(StringIO("[]"), self.schema)], [])
+        batches = [batch for batch in stream_array_columns(StringIO('[{"id": 1, "id": 2}]'), {"id": "i"})]
+        self.assertEqual(batches, [{"id": array("i", [2])}])
+
+    def test_errors(self):
+        for text, schema in (('[{"id": 1.5}]', {"id": "q"}), ('[{"id": true}]', {"id": "q"}), ('[{}]', {"id": "q"}),
+                             ('[{"id": 300}]', {"id": "b"}), ('[{"name": 1}]', {"name": str}), ('[1]', {}),
+                             ('[{"id": 1} {"id": 2}]', {"id": "q"}), ('[{"id" 1}]', {"id": "q"}),
+                             ('{"id": 1}', {"id": "q"}), ('[{"id": 1}', {"id": "q"}), ('[{"id": 1}] 1', {"id": "q"}),
+                             ('[{"a": null}]', {"a": bool}), ('[{"b": 1}]', {"a": bool}), ('[{"a": 1}]', {"a": bool})):
+            self.assertRaises(ValueError, list, stream_array_columns(StringIO(text), schema))
+        self.assertRaises(ValueError, stream_array_columns, StringIO("[]"), {"id": "x"})
+        self.assertRaises(ValueError, stream_array_columns, StringIO("[]"), {"id": int})
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy(self):
+        batch, = stream_array_columns(StringIO(self.records), self.schema, as_numpy=True)
+        self.assertListEqual(batch["id"].tolist(), [1, 2, 3])
+        self.assertEqual(batch["active"].dtype, numpy.bool_)
+        self.assertEqual(batch["name"].dtype, object)
+        self.assertListEqual(batch["tags"].tolist(), [["a"], None, None])
@@ -1,7 +1,13 @@
-from io import StringIO
+from decimal import Decimal
+from io import BytesIO, StringIO
 import json
+import os
+import tempfile
+import threading
+import time
 import unittest
-from naya.json import tokenize, TOKEN_TYPE, parse_string, parse, stream_array
+from naya.json import tokenize, TOKEN_TYPE, parse_string, parse, parse_file, stream_array, stream_array_file, \
+    IncrementalParser, KeyCache, Limits, ParseStats, RawNumber, stream_documents, stream_path, validate, Checkpoint
 
 
 class TestJsonTokenization(unittest.TestCase):
@@ -86,6 +92,16 @@ class TestJsonTokenization(unittest.TestCase):
         self.assertRaises(ValueError, self.tokenize_single_token, "\"\\!\"")
         self.assertRaises(ValueError, self.tokenize_single_token, "\"\\u!\"")
 
+    def test_surrogate_pairs(self):
+        self.assertStringEquals("\U0001f600", "\\ud83d\\ude00")
+        self.assertStringEquals("a\U0001f600b\U0001f680", "a\\uD83D\\uDE00b\\ud83d\\ude80")
+        self.assertStringEquals("\ud83dx", "\\ud83dx")
+        self.assertStringEquals("\ude00\ud83d", "\\ude00\\ud83d")
+        text = '["\\ud83d\\ude00 \\n", "\\ud83d", "\\ud83d\\u0041", "\\u00e9\\"\\/"]'
+        for buffer_size in (1, 2, 5, 7, 64):
+            self.assertListEqual(parse(StringIO(text), buffer_size), json.loads(text))
+            self.assertListEqual(parse(BytesIO(text.encode("utf-8")), buffer_size), json.loads(text))
+
     def test_sequence(self):
         result = [token for token in tokenize(StringIO("123 \"abc\":{}"))]
         self.assertEqual(result, [(2, 123), (1, 'abc'), (0, ':'), (0, '{'), (0, '}')])
@@ -140,6 +156,21 @@ class TestJsonTokenization(unittest.TestCase):
         self.assertRaises(ValueError, self.tokenize_sequence, "23.9e10true")
         self.assertRaises(ValueError, self.tokenize_sequence, "\"test\"56")
 
+    def test_buffer_sizes(self):
+        with open("tests/sample.json", "r", encoding="utf-8") as file:
+            expected = [token for token in tokenize(file)]
+        for buffer_size in (2, 3, 7, 64, 65536):
+            with open("tests/sample.json", "r", encoding="utf-8") as file:
+                result = [token for token in tokenize(file, buffer_size)]
+            self.assertListEqual(result, expected)
+
+    def test_error_index_across_chunks(self):
+        for buffer_size in (1, 2, 5, 100):
+            with self.assertRaisesRegex(ValueError, "at index 13$"):
+                list(tokenize(StringIO('["abc", 12, 3a]'), buffer_size))
+            with self.assertRaisesRegex(ValueError, "at index 9$"):
+                list(tokenize(StringIO('["abc\\u12g4"]'), buffer_size))
+
     def test_arrays(self):
         arr = parse_string('[]')
         self.assertListEqual(arr, [])
@@ -247,6 +278,46 @@ class TestJsonTokenization(unittest.TestCase):
         arr = stream_array(tokenize(StringIO('[[{"key1": "value1", "key2": 5}, {"key3": "value3", "key4": null}], {"key5": false, "key6": "5"}]')))
         self.assertListEqual([i for i in arr], [[{"key1": "value1", "key2": 5}, {"key3": "value3", "key4":None}], {"key5": False, "key6": "5"}])
 
+    def test_array_stream_batches(self):
+        text = '[1, "two", {"three": 3}, [4], null]'
+        self.assertListEqual([batch for batch in stream_array(StringIO(text), batch_size=2)],
+                             [[1, "two"], [{"three": 3}, [4]], [None]])
+        self.assertListEqual([batch for batch in stream_array(StringIO(text), batch_size=10, max_latency=5)],
+                             [[1, "two", {"three": 3}, [4], None]])
+        self.assertListEqual([batch for batch in stream_array(StringIO("[]"), batch_size=2, max_latency=5)], [])
+        self.assertRaises(ValueError, list, stream_array(StringIO("[1, 2 3]"), batch_size=2, max_latency=5))
+        self.assertRaises(ValueError, stream_array, StringIO("[]"), max_latency=5)
+        self.assertRaises(ValueError, stream_array, StringIO("[]"), batch_size=0)
+
+    def test_array_stream_max_latency(self):
+        read, write = os.pipe()
+        writer = threading.Thread(target=lambda: (os.write(write, b"[1, 2,"), time.sleep(1), os.write(write, b" 3]"),
+                                                  os.close(write)))
+        writer.start()
+        with os.fdopen(read, "rb", buffering=0) as fp:
+            start = time.monotonic()
+            batches = stream_array(fp, batch_size=10, max_latency=0.1)
+            self.assertListEqual(next(batches), [1, 2])
+            self.assertLess(time.monotonic() - start, 0.9)
+            self.assertListEqual([batch for batch in batches], [[3]])
+        writer.join()
+
+    def test_array_stream_null_and_errors(self):
+        arr = stream_array(tokenize(StringIO('[1, null, false, {"key": null}]')))
+        self.assertListEqual([i for i in arr], [1, None, False, {"key": None}])
+        self.assertRaises(ValueError, list, stream_array(tokenize(StringIO('["People" "Places"]'))))
+        self.assertRaises(ValueError, list, stream_array(tokenize(StringIO('[{"key": "value"} 1]'))))
+        self.assertRaises(ValueError, list, stream_array(tokenize(StringIO('[[1}]'))))
+        self.assertRaises(ValueError, list, stream_array(tokenize(StringIO('[1, 2'))))
+
+    def test_deep_nesting(self):
+        depth = 100000
+        self.assertEqual(len([i for i in stream_array(tokenize(StringIO("[" * depth + "]" * depth)))]), 1)
+        value = parse_string('{"a": ' * depth + "1" + "}" * depth)
+        for _ in range(depth):
+            value = value["a"]
+        self.assertEqual(value, 1)
+
     def test_large_sample(self):
         with open("tests/sample.json", "r", encoding="utf-8") as file:
             obj2 = json.load(file)
@@ -254,3 +325,483 @@ class TestJsonTokenization(unittest.TestCase):
             obj = parse(file)
 
         self.assertDictEqual(obj, obj2)
+
+    def test_parse_buffer_sizes(self):
+        with open("tests/sample.json", "r", encoding="utf-8") as file:
+            expected = json.load(file)
+        for buffer_size in (1, 2, 3, 7, 64):
+            with open("tests/sample.json", "r", encoding="utf-8") as file:
+                self.assertDictEqual(parse(file, buffer_size), expected)
+        text = '[1, -2.5e3, "a\\"b", {"key": ["\\u00e9", true, false, null], "other": {}}, []]'
+        for buffer_size in (1, 2, 5):
+            self.assertListEqual(parse(StringIO(text), buffer_size), json.loads(text))
+
+    def test_parse_errors(self):
+        for text, message in (('[2}', "Array items must be followed"), ('{"a": [] 1}', "Object key value pairs"),
+                              ('[1,]', "JSON value expected"), ('{"a":1,}', "Object key expected"),
+                              ('{1: 2}', "Object keys must be strings"), ('"text"', "Expected object or array"),
+                              ('', "not properly closed"), ('[1] 2', "Additional string")):
+            for buffer_size in (1, 3, 64):
+                with self.assertRaisesRegex(ValueError, message):
+                    parse(StringIO(text), buffer_size)
+
+
+class TestBinaryInput(unittest.TestCase):
+
+    def test_buffers(self):
+        text = '{"name": "caf\u00e9 \u2603", "values": [1, 2.5, true, null], "escaped": "a\\"b\\u00e9"}'
+        expected = json.loads(text)
+        data = text.encode("utf-8")
+        for source in (data, bytearray(data), memoryview(data), BytesIO(data)):
+            self.assertDictEqual(parse(source), expected)
+
+    def test_binary_stream_chunks(self):
+        with open("tests/sample.json", "rb") as file:
+            data = file.read()
+        expected = json.loads(data.decode("utf-8"))
+        for buffer_size in (3, 5, 4096):
+            self.assertDictEqual(parse(BytesIO(data), buffer_size), expected)
+
+    def test_binary_stream_array(self):
+        data = '["Apples", {"key": "välue"}, [1, 2]]'.encode("utf-8")
+        self.assertListEqual([i for i in stream_array(data)], ["Apples", {"key": "välue"}, [1, 2]])
+        self.assertListEqual([i for i in stream_array(BytesIO(data))], ["Apples", {"key": "välue"}, [1, 2]])
+        self.assertListEqual([i for i in stream_array(tokenize(BytesIO(data), 1))],
+                             ["Apples", {"key": "välue"}, [1, 2]])
+
+    def test_binary_errors(self):
+        with self.assertRaisesRegex(ValueError, "at index 9$"):
+            parse(b'["abc", 3a]')
+        with self.assertRaisesRegex(ValueError, "Invalid string escape"):
+            parse(BytesIO(b'["ab\\q"]'), 2)
+
+    def test_invalid_utf8(self):
+        for data in (b'["\xff"]', b'[{"\xff": 1}]', b'["a\\n\xff"]'):
+            for parse_data in (parse, lambda data: list(tokenize(BytesIO(data))), lambda data: list(stream_array(data)),
+                               lambda data: parse(BytesIO(data), 1)):
+                with self.assertRaisesRegex(ValueError, "Invalid UTF-8 at index"):
+                    parse_data(data)
+        with self.assertRaisesRegex(ValueError, "Invalid UTF-8 at index 5$"):
+            parse(b'[1, "\xc3("]')
+
+
+class TestMappedFiles(unittest.TestCase):
+
+    def write_temp(self, data):
+        handle, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, "wb") as file:
+            file.write(data)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_parse_file(self):
+        with open("tests/sample.json", "r", encoding="utf-8") as file:
+            expected = json.load(file)
+        self.assertDictEqual(parse_file("tests/sample.json"), expected)
+
+    def test_stream_array_file(self):
+        path = self.write_temp('[{"key1": "välue1"}, "Places", [0, 1, 2]]'.encode("utf-8"))
+        self.assertListEqual([i for i in stream_array_file(path)], [{"key1": "välue1"}, "Places", [0, 1, 2]])
+        path = self.write_temp(b"[]")
+        self.assertListEqual([i for i in stream_array_file(path)], [])
+        path = self.write_temp(b'["People", 12a]')
+        self.assertRaises(ValueError, list, stream_array_file(path))
+
+
+class TestIncrementalParser(unittest.TestCase):
+
+    def test_document(self):
+        with open("tests/sample.json", "rb") as file:
+            data = file.read()
+        expected = json.loads(data.decode("utf-8"))
+        for size in (1, 7, 4096):
+            parser = IncrementalParser()
+            completed = []
+            for i in range(0, len(data), size):
+                completed.extend(parser.feed(data[i:i + size]))
+            completed.extend(parser.close())
+            self.assertEqual(len(completed), 1)
+            self.assertDictEqual(completed[0], expected)
+
+    def test_stream_array(self):
+        parser = IncrementalParser(stream_array=True)
+        self.assertListEqual(parser.feed('["People", {"ke'), ["People"])
+        self.assertListEqual(parser.feed('y": [1, 2]}, null, 1'), [{"key": [1, 2]}, None])
+        self.assertListEqual(parser.feed('2'), [])
+        self.assertListEqual(parser.feed(']'), [12])
+        self.assertListEqual(parser.close(), [])
+
+    def test_errors(self):
+        for text in ('["People", "Places" "Things"]', '["People", "Places"', '[1, ]', '[1] 2'):
+            parser = IncrementalParser(stream_array=True)
+            with self.assertRaises(ValueError):
+                parser.feed(text)
+                parser.close()
+        for text in ('{"key": "value"', '{"key": "value"}}', '{"key", "value": "value2"}', '[2}', '"text"'):
+            parser = IncrementalParser()
+            with self.assertRaises(ValueError):
+                parser.feed(text)
+                parser.close()
+
+
+class TestStreamPath(unittest.TestCase):
+
+    document = '{"meta": {"tags": ["a", "b"], "deep": [[{"x": 1}]]}, "data": {"items": [{"id": 1}, {"id": 2}, ' \
+               '{"id": 3, "sub": [4]}], "count": 3}}'
+
+    def test_single_path(self):
+        self.assertListEqual([i for i in stream_path(StringIO(self.document), "data.items.*")],
+                             [{"id": 1}, {"id": 2}, {"id": 3, "sub": [4]}])
+        self.assertListEqual([i for i in stream_path(StringIO(self.document), "data.items.*.id")], [1, 2, 3])
+        self.assertListEqual([i for i in stream_path(StringIO(self.document), "data.items.1")], [{"id": 2}])
+        self.assertListEqual([i for i in stream_path(StringIO(self.document), "meta.missing")], [])
+        self.assertListEqual([i for i in stream_path(StringIO(self.document), "")], [json.loads(self.document)])
+
+    def test_multiple_paths(self):
+        result = [i for i in stream_path(self.document.encode("utf-8"), ["data.count", "meta.tags.*", "*.items.2.sub"])]
+        self.assertListEqual(result, [("meta.tags.*", "a"), ("meta.tags.*", "b"), ("*.items.2.sub", [4]),
+                                      ("data.count", 3)])
+
+    def test_streams_before_the_end(self):
+        items = stream_path(tokenize(StringIO('{"data": {"items": [{"id": 1}, {"id": 2}')), "data.items.*")
+        self.assertEqual(next(items), {"id": 1})
+        self.assertEqual(next(items), {"id": 2})
+        self.assertRaises(ValueError, next, items)
+
+    def test_skips_raw_input(self):
+        meta = '{"meta": {"s": "]}\\"[{", "e": "\\\\", "d": [[[[[[{"x": ["}"]}]]]]]], "n": [1, true, null]}, '
+        text = meta + '"skip": [{"a": "["}], "data": {"items": [{"id": 1}, {"id": "\\u005d"}]}}'
+
+        class Pipe:
+            def __init__(self, text):
+                self.text = text
+
+            def read(self, size):
+                chunk, self.text = self.text[:size], self.text[size:]
+                return chunk
+
+        expected = [{"id": 1}, {"id": "]"}]
+        for source in (StringIO(text), text.encode("utf-8"), Pipe(text), Pipe(text.encode("utf-8"))):
+            self.assertListEqual([i for i in stream_path(source, "data.items.*")], expected)
+        self.assertListEqual([i for i in stream_path(tokenize(StringIO(text)), "data.items.*")], expected)
+        self.assertListEqual([i for i in stream_path(Pipe(text), ["meta.d", "data.items.1.id"])],
+                             [("meta.d", [[[[[[{"x": ["}"]}]]]]]]), ("data.items.1.id", "]")])
+
+    def test_errors(self):
+        for text in ('{"data": {"items": [1 2]}}', '{"data" 1}', '{"data": [1]} 2', '{"data": [1}', '{1: 2}',
+                     '{"skip": [1}, "data": [1]}', '{"skip": [[1], "data": [1]}', '{"skip": ["]", "data": [1]}'):
+            self.assertRaises(ValueError, list, stream_path(StringIO(text), "data.*"))
+            self.assertRaises(ValueError, list, stream_path(text.encode("utf-8"), "data.*"))
+
+
+class TestKeyCache(unittest.TestCase):
+
+    records = '[{"identifier": 1, "description": "a"}, {"identifier": 2, "description": "b"}, {"identifier": 3}]'
+
+    def assertKeysShared(self, records):
+        first, second, third = [list(record) for record in records]
+        self.assertIs(first[0], second[0])
+        self.assertIs(first[1], second[1])
+        self.assertIs(first[0], third[0])
+
+    def test_interning(self):
+        cache = KeyCache()
+        records = [i for i in stream_array(tokenize(StringIO(self.records)), key_cache=cache)]
+        self.assertListEqual(records, json.loads(self.records))
+        self.assertKeysShared(records)
+        self.assertKeysShared(parse_string(self.records, key_cache=cache))
+        parser = IncrementalParser(stream_array=True, key_cache=cache)
+        records = parser.feed(self.records) + parser.close()
+        self.assertListEqual(records, json.loads(self.records))
+        self.assertKeysShared(records)
+
+    def test_bounds(self):
+        cache = KeyCache(max_keys=2, max_shapes=1)
+        parse_string('[{"a": 1, "b": 2}, {"c": 3, "a": 4}]', key_cache=cache)
+        self.assertLessEqual(len(cache.keys), 2)
+        parser = IncrementalParser(key_cache=cache)
+        self.assertListEqual(parser.feed('[{"a": 1, "b": 2}, {"c": 3, "a": 4}, {"a": 5, "a": 6}]'),
+                             [[{"a": 1, "b": 2}, {"c": 3, "a": 4}, {"a": 6}]])
+        self.assertLessEqual(len(cache.keys), 2)
+        self.assertEqual(len(cache.shapes), 1)
+
+
+class TestParseStats(unittest.TestCase):
+
+    def test_stream_array(self):
+        latencies = []
+        stats = ParseStats(on_element=latencies.append)
+        text = '[1, {"key": [true, "value"]}, null]'
+        self.assertListEqual([i for i in stream_array(StringIO(text), stats=stats)],
+                             [1, {"key": [True, "value"]}, None])
+        self.assertEqual(stats.bytes, len(text))
+        self.assertEqual(stats.reads, 1)
+        self.assertDictEqual(stats.tokens, {TOKEN_TYPE.OPERATOR: 10, TOKEN_TYPE.STRING: 2, TOKEN_TYPE.NUMBER: 1,
+                                            TOKEN_TYPE.BOOLEAN: 1, TOKEN_TYPE.NULL: 1})
+        self.assertEqual(stats.max_depth, 3)
+        self.assertEqual(stats.elements, 3)
+        self.assertEqual(len(latencies), 3)
+        self.assertEqual(stats.max_element_time, max(latencies))
+        self.assertGreaterEqual(stats.elapsed, stats.read_time)
+        self.assertGreaterEqual(stats.cpu_time, 0)
+
+    def test_parse_and_tokenize(self):
+        stats = ParseStats()
+        self.assertDictEqual(parse(BytesIO(b'{"key": [1, [2]]}'), stats=stats), {"key": [1, [2]]})
+        self.assertEqual(stats.bytes, 17)
+        self.assertEqual(stats.max_depth, 3)
+        self.assertEqual(stats.tokens[TOKEN_TYPE.NUMBER], 2)
+        self.assertEqual(stats.elements, 0)
+        stats = ParseStats()
+        self.assertListEqual(parse_string('[1, 2]', stats=stats), [1, 2])
+        self.assertEqual(stats.tokens[TOKEN_TYPE.OPERATOR], 3)
+        stats = ParseStats()
+        self.assertEqual(len([token for token in tokenize(StringIO('["a", 1]'), 4, stats)]), 5)
+        self.assertEqual(stats.reads, 2)
+        self.assertEqual(stats.tokens[TOKEN_TYPE.STRING], 1)
+        self.assertRaises(ValueError, parse_string, '[1, 2', stats=ParseStats())
+
+
+class TestLimits(unittest.TestCase):
+
+    limits = Limits(max_depth=3, max_string_length=5, max_number_length=4, max_bytes=40, max_members=3)
+
+    def assertLimited(self, text, message):
+        for buffer_size in (1, 3, 64):
+            with self.assertRaisesRegex(ValueError, message):
+                parse(StringIO(text), buffer_size, limits=self.limits)
+            with self.assertRaisesRegex(ValueError, message):
+                parse(BytesIO(text.encode("utf-8")), buffer_size, limits=self.limits)
+            with self.assertRaisesRegex(ValueError, message):
+                list(stream_array(tokenize(StringIO(text), buffer_size, limits=self.limits)))
+
+    def test_within_limits(self):
+        text = '[[["abcde", 1234]], {"a": 1e10, "b": 2}]'
+        for buffer_size in (1, 3, 64):
+            self.assertListEqual(parse(StringIO(text), buffer_size, limits=self.limits), json.loads(text))
+        self.assertListEqual(parse_string(text, limits=self.limits), json.loads(text))
+
+    def test_limits(self):
+        self.assertLimited('[[[[1]]]]', "Nesting is deeper than the limit of 3 at index 3$")
+        self.assertLimited('["abcdef"]', "String is longer than the limit of 5 at index 2$")
+        self.assertLimited('["a\\nbcd"]', "String is longer than the limit of 5 at index 2$")
+        self.assertLimited('[1, 12345]', "Number is longer than the limit of 4 at index 4$")
+        self.assertLimited('[1, -1.5e1]', "Number is longer than the limit of 4 at index 4$")
+        self.assertLimited('[1, 2, 3, 4]', "more members than the limit of 3 at index 8$")
+        self.assertLimited('[{"a": 1, "b": 2, "c": 3, "d": 4}]', "more members than the limit of 3 at index 24$")
+        self.assertLimited('[1]' + ' ' * 40, "Input is longer than the limit of 40 at index 40$")
+
+    def test_incremental_parser(self):
+        parser = IncrementalParser(stream_array=True, limits=self.limits)
+        self.assertListEqual(parser.feed('[1, "ab'), [1])
+        self.assertRaisesRegex(ValueError, "String is longer", parser.feed, 'cdef"]')
+        parser = IncrementalParser(limits=self.limits)
+        self.assertRaisesRegex(ValueError, "Nesting is deeper", parser.feed, '[[[[')
+
+    def test_token_stream(self):
+        tokens = tokenize(StringIO('[[[[[1]]]], "abcdefghij"]'))
+        self.assertRaisesRegex(ValueError, "pass them to tokenize", stream_array, tokens, limits=self.limits)
+
+
+class TestNumberConversion(unittest.TestCase):
+
+    text = '{"price": 1.10, "values": [12, -3.5e2, 0.1], "count": 7}'
+
+    def test_parse_float(self):
+        expected = {"price": Decimal("1.10"), "values": [12, Decimal("-3.5e2"), Decimal("0.1")], "count": 7}
+        for buffer_size in (1, 3, 64):
+            self.assertDictEqual(parse(StringIO(self.text), buffer_size, parse_float=Decimal), expected)
+            self.assertDictEqual(parse(BytesIO(self.text.encode()), buffer_size, parse_float=Decimal), expected)
+        self.assertDictEqual(parse_string(self.text, parse_float=Decimal), expected)
+        self.assertListEqual([i for i in stream_array(BytesIO(b'[1.5, 2]'), parse_float=Decimal)], [Decimal("1.5"), 2])
+        self.assertRaises(ValueError, stream_array, tokenize(StringIO('[1.5]')), parse_float=Decimal)
+        self.assertListEqual([i for i in stream_array(tokenize(StringIO('[1.5]'), parse_float=Decimal))],
+                             [Decimal("1.5")])
+
+    def test_parse_int(self):
+        obj = parse_string(self.text, parse_int=float)
+        self.assertIsInstance(obj["count"], float)
+        self.assertIsInstance(obj["price"], float)
+        tokens = [token for token in tokenize(StringIO("[5, 6.5]"), parse_int=str)]
+        self.assertListEqual(tokens, [(0, "["), (2, "5"), (0, ","), (2, 6.5), (0, "]")])
+
+    def test_raw_numbers(self):
+        for buffer_size in (1, 64):
+            obj = parse(BytesIO(self.text.encode()), buffer_size, parse_int=RawNumber, parse_float=RawNumber)
+            self.assertDictEqual(obj, {"price": "1.10", "values": ["12", "-3.5e2", "0.1"], "count": "7"})
+            self.assertIsInstance(obj["count"], RawNumber)
+            self.assertEqual(Decimal(obj["price"]), Decimal("1.10"))
+        parser = IncrementalParser(stream_array=True, parse_int=RawNumber, parse_float=RawNumber)
+        self.assertListEqual(parser.feed("[1, 2.0"), ["1"])
+        self.assertListEqual(parser.feed("0]") + parser.close(), ["2.00"])
+
+
+class TestStreamDocuments(unittest.TestCase):
+
+    def test_documents(self):
+        for text in ('{"a": 1}\n{"b": [2]}\n[3]\n4\n"five"\ntrue\nnull\n-1.5\n',
+                     '{"a":1}{"b":[2]}[3] 4 "five" true null -1.5'):
+            expected = [{"a": 1}, {"b": [2]}, [3], 4, "five", True, None, -1.5]
+            for fp in (StringIO(text), BytesIO(text.encode("utf-8")), text.encode("utf-8")):
+                self.assertListEqual([i for i in stream_documents(fp)], expected)
+        self.assertListEqual([i for i in stream_documents(StringIO(" \n "))], [])
+
+    def test_documents_after_strings(self):
+        text = '"a""b"["c"]"d"{"e": "f"}'
+        for buffer_size in (None, 1, 2, 3):
+            for fp in (StringIO(text), BytesIO(text.encode("utf-8"))):
+                self.assertListEqual([i for i in stream_documents(fp, buffer_size=buffer_size)],
+                                     ["a", "b", ["c"], "d", {"e": "f"}])
+        for text in ('["a""b"]', '{"a""b": 1}', '"a"1', '"a"true'):
+            self.assertRaisesRegex(ValueError, "Expected whitespace or an operator after string", list,
+                                   stream_documents(StringIO(text)))
+
+    def test_chunked_reads(self):
+        reads = []
+
+        class Reads(StringIO):
+            def read(self, size=-1):
+                reads.append(size)
+                return super().read(size)
+
+        text = "".join('{{"id": {}}}\n'.format(i) for i in range(1000))
+        self.assertEqual(len([i for i in stream_documents(Reads(text))]), 1000)
+        self.assertLessEqual(len(reads), 2)
+        del reads[:]
+        self.assertEqual(len([i for i in stream_documents(Reads(text), buffer_size=1000)]), 1000)
+        self.assertEqual(len(reads), len(text) // 1000 + 2)
+
+    def test_streams_before_the_end(self):
+        documents = stream_documents(StringIO('{"a": 1}\n{"b": 2}\n{"c": '))
+        self.assertDictEqual(next(documents), {"a": 1})
+        self.assertDictEqual(next(documents), {"b": 2})
+        self.assertRaises(ValueError, next, documents)
+
+    def test_errors(self):
+        for text in ('{"a": 1}\n{"b"', '[1]]', '{"a" 1}', '12a', ']'):
+            self.assertRaises(ValueError, list, stream_documents(StringIO(text)))
+
+
+class TestValidate(unittest.TestCase):
+
+    valid = ('{}', '[]', ' [1, -2.5e3, "a\\"b", true, false, null] ', '{"a": {"b": [{}, [[]], {"c": "\\u00e9"}]}}',
+             '[[[[[[1]]]], {"a": [{"b": {"c": 1}}]}]]', '{"": "", "a" : 1 , "b" : [ 2 , 3 ] }',
+             '["é", {"日本語": "テキスト\\u00e9"}, "€𝄞"]')
+    invalid = ('', ' ', '1', '"a"', '[1,]', '[,1]', '[1 2]', '[1]]', '[[1]', '[1] 2', '{"a": 1,}', '{"a" 1}', '{1: 2}',
+               '{"a"}', '{"a": 1 "b": 2}', '[tru]', '[01]', '[1.]', '[-]', '["a\\x"]', '["a" "b"]', '[{"a": [1, 2,]}]',
+               '[[1, 2], [3 4]]', '{"a": {"b": {"c": {"d": [1,]}}}}', '"é"', '{"é": 1,}', '[1, "日本語" 2]')
+
+    def sources(self, text):
+        yield text
+        yield text.encode("utf-8")
+        for buffer_size in (1, 2, 5):
+            yield StringIO(text), buffer_size
+            yield BytesIO(text.encode("utf-8")), buffer_size
+
+    def validate(self, source):
+        if isinstance(source, tuple):
+            return validate(*source)
+        return validate(source)
+
+    def test_agrees_with_parse(self):
+        for text in self.valid:
+            for source in self.sources(text):
+                self.assertTrue(self.validate(source))
+            self.assertTrue(validate(text, stats=ParseStats()))
+            self.assertTrue(validate(text, limits=Limits(max_depth=10)))
+        for text in self.invalid:
+            self.assertRaises(ValueError, parse_string, text)
+            for source in self.sources(text):
+                self.assertRaises(ValueError, self.validate, source)
+            self.assertRaises(ValueError, validate, text, stats=ParseStats())
+
+    def test_records(self):
+        records = [{"id": i, "name": "user {}".format(i), "tags": ["a", {"b": [i, None]}], "deep": [[[[{"e": i}]]]]}
+                   for i in range(1000)]
+        text = json.dumps(records)
+        for buffer_size in (100, 65536):
+            self.assertTrue(validate(StringIO(text), buffer_size))
+            self.assertTrue(validate(text.encode("utf-8"), buffer_size))
+        error = text.index('"id": 500,') + 10
+        with self.assertRaisesRegex(ValueError, "at index {}".format(error)):
+            validate(text[:error] + "," + text[error:])
+
+    def test_error_index(self):
+        with self.assertRaisesRegex(ValueError, "at index 12"):
+            validate('{"a": [1, 2,]}')
+        with self.assertRaisesRegex(ValueError, "at index 2"):
+            validate(BytesIO(b'["\xff"]'), 1)
+        with self.assertRaisesRegex(ValueError, "Nesting is deeper than the limit of 2"):
+            validate("[[[1]]]", limits=Limits(max_depth=2))
+
+    def test_limits(self):
+        records = json.dumps([{"id": i, "tags": ["a", [i, {"b": "x" * (i % 9)}]]} for i in range(200)])
+        self.assertTrue(validate(records, limits=Limits(max_depth=5, max_string_length=8, max_members=200)))
+        for limits in (Limits(max_string_length=7), Limits(max_number_length=2), Limits(max_depth=4),
+                       Limits(max_members=150), Limits(max_members=3, max_depth=5), Limits(max_bytes=1000)):
+            with self.assertRaises(ValueError) as expected:
+                parse_string(records, limits=limits)
+            for buffer_size in (100, 65536):
+                with self.assertRaises(ValueError) as error:
+                    validate(records, buffer_size, limits=limits)
+                self.assertEqual(str(error.exception), str(expected.exception))
+
+    def test_stats(self):
+        stats = ParseStats()
+        self.assertTrue(validate(BytesIO(b'{"key": [1, [2, "x"]]}'), stats=stats))
+        self.assertEqual(stats.bytes, 22)
+        self.assertEqual(stats.max_depth, 3)
+        self.assertEqual(stats.tokens[TOKEN_TYPE.NUMBER], 2)
+        self.assertEqual(stats.tokens[TOKEN_TYPE.STRING], 2)
+        self.assertEqual(stats.tokens[TOKEN_TYPE.OPERATOR], 9)
+        with self.assertRaisesRegex(ValueError, "at index 6$"):
+            validate('[1, 2,]', stats=ParseStats())
+
+
+class TestCheckpoints(unittest.TestCase):
+
+    text = '[1, {"a": [1, 2]}, "x\\"y", [3], true, {"b": {}}, -2.5e3, null, [[]], "\\u00e9"]'
+    expected = json.loads(text)
+
+    def sources(self):
+        yield lambda: StringIO(self.text)
+        yield lambda: BytesIO(self.text.encode("utf-8"))
+        yield lambda: self.text.encode("utf-8")
+
+    def test_resume(self):
+        for source in self.sources():
+            pairs = [pair for pair in stream_array(source(), checkpoints=True)]
+            self.assertListEqual([value for value, _ in pairs], self.expected)
+            self.assertListEqual([checkpoint.elements for _, checkpoint in pairs], list(range(1, 11)))
+            for index, (_, checkpoint) in enumerate(pairs):
+                checkpoint = Checkpoint(**json.loads(json.dumps(checkpoint.to_dict())))
+                self.assertListEqual([i for i in stream_array(source(), resume_from=checkpoint)],
+                                     self.expected[index + 1:])
+                resumed = [pair for pair in stream_array(source(), resume_from=checkpoint, checkpoints=True,
+                                                         limits=Limits(max_depth=3, max_members=10))]
+                self.assertListEqual(resumed, pairs[index + 1:])
+
+    def test_files(self):
+        handle, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, "w", encoding="utf-8") as file:
+            file.write(json.dumps([{"id": i, "name": "é" * (i % 3)} for i in range(100)]))
+        self.addCleanup(os.remove, path)
+        for mode in ("r", "rb"):
+            with open(path, mode) as file:
+                pairs = [pair for pair in stream_array(file, checkpoints=True)]
+            with open(path, mode) as file:
+                stats = ParseStats()
+                resumed = [i for i in stream_array(file, resume_from=pairs[49][1], stats=stats)]
+            self.assertListEqual(resumed, [value for value, _ in pairs[50:]])
+            self.assertEqual(stats.elements, 50)
+        batches = [batch for batch in stream_array(BytesIO(b"[1, 2, 3]"), checkpoints=True, batch_size=2)]
+        self.assertListEqual([[value for value, _ in batch] for batch in batches], [[1, 2], [3]])
+
+    def test_errors(self):
+        pairs = [pair for pair in stream_array(StringIO(self.text), checkpoints=True)]
+        self.assertRaises(ValueError, list, stream_array(BytesIO(self.text.encode("utf-8")), resume_from=pairs[0][1]))
+        self.assertRaises(ValueError, list, stream_array(tokenize(StringIO(self.text)), checkpoints=True))
+        with self.assertRaisesRegex(ValueError, "at index 20"):
+            list(stream_array(StringIO('[1, {"a": [1, 2]}, 1x]'), resume_from=pairs[1][1]))
+        for text in ('[1, 2', '[1 2]', '{"a": 1}', '[1] 2'):
+            self.assertRaises(ValueError, list, stream_array(StringIO(text), checkpoints=True))
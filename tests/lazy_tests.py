@@ -0,0 +1,50 @@
+import json
+import mmap
+import unittest
+from naya.lazy import LazyArray, LazyObject, parse_lazy
+
+
+class TestLazyParsing(unittest.TestCase):
+
+    document = '{"id": 7, "name": "caf\\u00e9", "tags": ["a", "b,]"], "nested": {"x": [1, {"y": null}]}, ' \
+               '"empty": {}, "none": []}'
+
+    def test_access(self):
+        for buffer in (self.document, self.document.encode("utf-8"), memoryview(self.document.encode("utf-8"))):
+            obj = parse_lazy(buffer)
+            self.assertIsInstance(obj, LazyObject)
+            self.assertEqual(obj["id"], 7)
+            self.assertEqual(obj["name"], "café")
+            self.assertIsInstance(obj["tags"], LazyArray)
+            self.assertEqual(obj["tags"][1], "b,]")
+            self.assertEqual(obj["tags"][-1], "b,]")
+            self.assertIsNone(obj["nested"]["x"][1]["y"])
+            self.assertListEqual(list(obj), ["id", "name", "tags", "nested", "empty", "none"])
+            self.assertEqual(len(obj["none"]), 0)
+            self.assertEqual(obj, json.loads(self.document))
+            self.assertRaises(KeyError, obj.__getitem__, "missing")
+            self.assertRaises(IndexError, obj["tags"].__getitem__, 2)
+
+    def test_nesting(self):
+        text = ' {"a\\"b": [[[[[[{"c": "]"}]]]]]], "\\u00e9": {"d": [[[[[1]]]]], "e": 2},\n "f" : [ 3 , "}" ] } '
+        for buffer in (text, text.encode("utf-8")):
+            obj = parse_lazy(buffer)
+            self.assertEqual(obj["a\"b"][0][0][0][0][0][0]["c"], "]")
+            self.assertEqual(obj["é"]["e"], 2)
+            self.assertListEqual(list(obj["f"]), [3, "}"])
+            self.assertEqual(obj, json.loads(text))
+
+    def test_materialize(self):
+        with open("tests/sample.json", "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            expected = json.loads(buffer[:].decode("utf-8"))
+            self.assertDictEqual(parse_lazy(buffer).materialize(), expected)
+        self.assertListEqual(parse_lazy("[1, [2, 3]]")[1].materialize(), [2, 3])
+
+    def test_errors(self):
+        for text in ('[1]]', '{"a":1}x', '{"a": [1}', '["abc', '"abc"', '', '[[[[[[1]]]]]', '[[[[[[1]]]]]}'):
+            self.assertRaises(ValueError, parse_lazy, text)
+        for text in ('[1,]', '[1 2]', '{"a" 1}', '{"a": 1 "b": 2}', '[,1]', '{"a": [] 1}', '{1: 2}', '{"a":}',
+                     '{:1}', '[1, 2a]', '{"\\x": 1}'):
+            obj = parse_lazy(text)
+            self.assertRaises(ValueError, lambda: [obj[key] for key in obj] if isinstance(obj, LazyObject)
+                              else list(obj))
@@ -0,0 +1,80 @@
+from io import BytesIO, StringIO
+import json
+import unittest
+from naya.parallel import parse_parallel, stream_array_parallel, stream_documents_parallel
+
+
+class TestParallelStreamArray(unittest.TestCase):
+
+    def test_ordered(self):
+        text = '[{"key1": "value1", "key2": [1, 2]}, "Pla,ces]", [0, 1, 2], 3.5, null, {"k": "v\\"}"}]'
+        expected = json.loads(text)
+        for batch_size in (1, 20, 65536):
+            result = [i for i in stream_array_parallel(StringIO(text), workers=2, batch_size=batch_size)]
+            self.assertListEqual(result, expected)
+
+    def test_unordered(self):
+        data = json.dumps([{"id": i, "name": "item {}".format(i)} for i in range(200)]).encode("utf-8")
+        result = [i for i in stream_array_parallel(BytesIO(data), workers=2, ordered=False, batch_size=100,
+                                                   max_pending=1)]
+        self.assertListEqual(sorted(result, key=lambda item: item["id"]), json.loads(data.decode("utf-8")))
+
+    def test_chunk_boundaries(self):
+        class Pipe:
+            def __init__(self, data):
+                self.data = data
+
+            def read(self, size):
+                chunk, self.data = self.data[:7], self.data[7:]
+                return chunk
+
+        text = '[{"a": "x,]}\\"", "b": [[[[[[{"c": [1, "]"]}]]]]]]}, [[[[[[]]]]]], "{,[", 2, {"d": {"e": {}}}]'
+        for data in (text, text.encode("utf-8")):
+            self.assertListEqual([i for i in stream_array_parallel(Pipe(data), workers=1)], json.loads(text))
+
+    def test_empty(self):
+        self.assertListEqual([i for i in stream_array_parallel(b" [ ] ", workers=1)], [])
+
+    def test_errors(self):
+        for text in ('[1,]', '[1 2]', '{"a": 1}', '[1] x', '[1', '[,]', '[1}', '[1, "abc]'):
+            self.assertRaises(ValueError, list, stream_array_parallel(StringIO(text), workers=1))
+        with self.assertRaisesRegex(ValueError, "at index 9$"):
+            list(stream_array_parallel(b'["abc", 3a]', workers=1))
+
+
+class TestParallelParse(unittest.TestCase):
+
+    def test_object(self):
+        with open("tests/sample.json", "rb") as file:
+            data = file.read()
+        expected = json.loads(data.decode("utf-8"))
+        for batch_size in (1, 1000, 65536):
+            self.assertDictEqual(parse_parallel(data, workers=2, batch_size=batch_size), expected)
+        self.assertDictEqual(parse_parallel(StringIO('{"a": 1, "a": 2, "b": {"c": [3]}}'), workers=1),
+                             {"a": 2, "b": {"c": [3]}})
+        self.assertDictEqual(parse_parallel(StringIO("{}"), workers=1), {})
+
+    def test_array(self):
+        text = '[{"key1": "value1"}, "Places", [0, 1, 2]]'
+        self.assertListEqual(parse_parallel(StringIO(text), workers=2, batch_size=1), json.loads(text))
+
+    def test_errors(self):
+        for text in ('{"a": 1,}', '{"a" 1}', '{1: 2}', '{"a": 1]', '"abc"', '{"a": 1} 2', '{"a": [1}'):
+            self.assertRaises(ValueError, parse_parallel, StringIO(text), workers=1)
+        with self.assertRaisesRegex(ValueError, "at index 19$"):
+            parse_parallel(b'{"a": 1, "b": [2, 3x]}', workers=1)
+
+
+class TestParallelStreamDocuments(unittest.TestCase):
+
+    def test_documents(self):
+        documents = [{"id": i, "values": [i, "x" * (i % 7)]} for i in range(500)] + [1, "text", None, []]
+        text = "\n".join(json.dumps(document) for document in documents)
+        for fp in (StringIO(text), BytesIO(text.encode("utf-8")), text.encode("utf-8") + b"\n"):
+            self.assertListEqual([i for i in stream_documents_parallel(fp, workers=2, batch_size=100)], documents)
+        self.assertListEqual([i for i in stream_documents_parallel(StringIO("\n \n"), workers=1)], [])
+
+    def test_errors(self):
+        with self.assertRaisesRegex(ValueError, "at index 6$"):
+            list(stream_documents_parallel(StringIO('1\n2\n[3a]\n4\n'), workers=2, batch_size=1))
+        self.assertRaises(ValueError, list, stream_documents_parallel(StringIO('1\n{"a": 1\n'), workers=2))
@@ -0,0 +1,69 @@
+import json
+import unittest
+from io import BytesIO, StringIO
+from naya.transform import DROP, Rename, transform
+
+
+class TestTransform(unittest.TestCase):
+
+    document = '{"users": [{"name": "a", "password": "x", "meta": {"k": [1, {"z": "}"}]}}, ' \
+               '{"name": "b\\u00e9", "password": "y"}], "n": 1.5e3, "t": true}'
+
+    def transform(self, source, rules, buffer_size=65536):
+        fp = StringIO()
+        transform(source, fp, rules, buffer_size)
+        return fp.getvalue()
+
+    def test_copies_untouched_text(self):
+        self.assertEqual(self.transform(self.document, {}), self.document)
+        self.assertEqual(self.transform(self.document, {"missing.path": DROP}), self.document)
+
+    def test_rules(self):
+        result = self.transform(self.document, {"users.*.password": "***", "users.*.name": str.upper,
+                                                "n": Rename("count"), "users.1": DROP})
+        self.assertEqual(result, '{"users": [{"name": "A", "password": "***", "meta": {"k": [1, {"z": "}"}]}}], '
+                                 '"count": 1.5e3, "t": true}')
+        result = self.transform(self.document, {"users.*.meta": Rename("m"), "users.*.meta.k.1": DROP,
+                                                "users.*.password": lambda value: DROP})
+        self.assertEqual(json.loads(result), {"users": [{"name": "a", "m": {"k": [1]}}, {"name": "bé"}],
+                                              "n": 1500.0, "t": True})
+        self.assertEqual(self.transform('{"a": 1}', {"": lambda value: [value]}), '[{"a":1}]')
+
+    def test_drop(self):
+        for rules, expected in (({"0": DROP}, [2, 3]), ({"1": DROP}, [1, 3]), ({"2": DROP}, [1, 2]),
+                                ({"0": DROP, "1": DROP}, [3]), ({"*": DROP}, []), ({"1": DROP, "2": DROP}, [1])):
+            self.assertListEqual(json.loads(self.transform("[1, 2, 3]", rules)), expected)
+            text = '[[1], {"a": [1]}, "3"]'
+            self.assertEqual(json.loads(self.transform(text, rules)),
+                             [value for index, value in enumerate(json.loads(text)) if expected.count(index + 1)])
+        for rules, expected in (({"a": DROP}, {"b": 2, "c": 3}), ({"b": DROP, "c": DROP}, {"a": 1}),
+                                ({"a": DROP, "c": DROP}, {"b": 2})):
+            self.assertDictEqual(json.loads(self.transform('{"a": 1, "b": 2, "c": 3}', rules)), expected)
+        self.assertEqual(self.transform("[]", {"0": DROP}), "[]")
+
+    def test_chunks(self):
+        rules = {"users.0.meta.k": DROP, "users.*.password": lambda value: DROP, "users.1.name": "c"}
+        expected = self.transform(self.document, rules)
+        for buffer_size in (1, 2, 3, 5, 8):
+            self.assertEqual(self.transform(StringIO(self.document), rules, buffer_size), expected)
+            fp = BytesIO()
+            transform(BytesIO(self.document.encode("utf-8")), fp, rules, buffer_size)
+            self.assertEqual(fp.getvalue().decode("utf-8"), expected)
+        self.assertEqual(self.transform(self.document.encode("utf-8"), rules), expected)
+
+    def test_records(self):
+        records = [{"id": i, "name": "user\"{}".format(i), "password": "secret", "profile": {"tags": ["a", "["]}}
+                   for i in range(1000)]
+        text = json.dumps(records)
+        result = self.transform(StringIO(text), {"*.password": "***", "*.profile.tags": DROP}, 100)
+        self.assertListEqual(json.loads(result), [dict(record, password="***", profile={}) for record in records])
+
+    def test_errors(self):
+        for text in ('{"a": 1', '{"a": [1}', '[1] 2', '{"a": "x', '', ']'):
+            for rules in ({"a": DROP}, {}, {"0": DROP}, {"a": str}):
+                self.assertRaises(ValueError, self.transform, text, rules)
+        # only the brackets and strings of untouched values are checked, so these are found in walked containers
+        for text in ('{"a" 1}', '{1: 2}', '{"a": 1,}', '{"a": 1 "b": 2}', '{"a": tru}', '{"a": -}', '{"b": 01}'):
+            self.assertRaises(ValueError, self.transform, text, {"a": DROP})
+        self.assertRaises(ValueError, self.transform, "[1]", {"0": Rename("a")})
+        self.assertRaises(ValueError, self.transform, "[1]", {"": DROP})
@@ -0,0 +1,115 @@
+import json
+import unittest
+from collections import OrderedDict
+from decimal import Decimal
+from io import BytesIO, StringIO
+from naya.json import RawNumber, parse_string, stream_array
+from naya.lazy import parse_lazy
+from naya.writer import StreamArrayWriter, dump
+
+
+class CountingWriter:
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, chunk):
+        self.chunks.append(chunk)
+
+
+class TestDump(unittest.TestCase):
+
+    def dumps(self, obj, buffer_size=65536):
+        fp = StringIO()
+        dump(obj, fp, buffer_size)
+        return fp.getvalue()
+
+    def test_values(self):
+        obj = {"a": [1, -2.5, None, True, False, "xé\"\n\\", {"b": {}}, []], "c": (1, 2), 1: "int key",
+               None: 0, "nested": [[[{"d": [1e100]}]]]}
+        self.assertEqual(self.dumps(obj), json.dumps(obj, separators=(",", ":"), ensure_ascii=False))
+        for value in ("", 0, 1.5, None, True, [], {}):
+            self.assertEqual(self.dumps(value), json.dumps(value))
+
+    def test_iterables(self):
+        self.assertEqual(self.dumps((i for i in range(3))), "[0,1,2]")
+        self.assertEqual(self.dumps({"items": iter([{"a": (i for i in [1])}, iter([])])}), '{"items":[{"a":[1]},[]]}')
+        self.assertEqual(self.dumps(OrderedDict([("a", 1), ("b", set())])), '{"a":1,"b":[]}')
+        self.assertEqual(self.dumps(parse_lazy('{"a": [1, {"b": null}]}')), '{"a":[1,{"b":null}]}')
+        records = [{"id": i, "tags": (t for t in "ab")} if i % 5 else i for i in range(1000)]
+        expected = [{"id": i, "tags": ["a", "b"]} if i % 5 else i for i in range(1000)]
+        self.assertListEqual(json.loads(self.dumps(iter(records), 100)), expected)
+        self.assertListEqual(json.loads(self.dumps(list(range(5000)))), list(range(5000)))
+
+    def test_numbers(self):
+        self.assertEqual(self.dumps([Decimal("1.10"), RawNumber("1e400"), {"a": [Decimal("-0.5")]}]),
+                         '[1.10,1e400,{"a":[-0.5]}]')
+        self.assertEqual(self.dumps({"a": RawNumber("2.00"), "b": [RawNumber("3")]}), '{"a":2.00,"b":[3]}')
+        self.assertEqual(self.dumps({RawNumber("1"): 2, "a": {RawNumber("3"): RawNumber("4.0")}}),
+                         '{"1":2,"a":{"3":4.0}}')
+        self.assertEqual(self.dumps({i: {RawNumber("1"): 2} for i in range(2000)}),
+                         json.dumps({i: {"1": 2} for i in range(2000)}, separators=(",", ":")))
+        self.assertRaises(ValueError, self.dumps, float("nan"))
+        self.assertRaises(ValueError, self.dumps, [float("inf")])
+        self.assertRaises(ValueError, self.dumps, (x for x in [Decimal("NaN")]))
+
+    def test_round_trip(self):
+        text = '[{"id": 1, "price": 2.50, "name": "café"}, {"id": 2, "price": 1e3, "name": "\\ud83d\\ude00"}]'
+        fp = StringIO()
+        dump(stream_array(StringIO(text), parse_int=RawNumber, parse_float=RawNumber), fp)
+        self.assertEqual(fp.getvalue(),
+                         '[{"id":1,"price":2.50,"name":"café"},{"id":2,"price":1e3,"name":"\U0001f600"}]')
+        self.assertListEqual(parse_string(fp.getvalue()), parse_string(text))
+
+    def test_binary(self):
+        fp = BytesIO()
+        dump({"name": "café"}, fp)
+        self.assertEqual(fp.getvalue(), '{"name":"café"}'.encode("utf-8"))
+
+    def test_chunked(self):
+        fp = CountingWriter()
+        dump(({"id": i, "name": "x" * 10} for i in range(1000)), fp, buffer_size=1000)
+        self.assertGreater(len(fp.chunks), 10)
+        self.assertTrue(all(len(chunk) < 2000 for chunk in fp.chunks))
+        self.assertListEqual(json.loads("".join(fp.chunks)), [{"id": i, "name": "x" * 10} for i in range(1000)])
+
+    def test_errors(self):
+        circular = []
+        circular.append(circular)
+        big = list(range(2000))
+        big.append(big)
+        for value in (object(), b"bytes", [1, object()], {(1, 2): 3}, circular, big, iter([circular])):
+            self.assertRaises((TypeError, ValueError), self.dumps, value)
+
+
+class TestStreamArrayWriter(unittest.TestCase):
+
+    def test_write(self):
+        fp = StringIO()
+        with StreamArrayWriter(fp, buffer_size=16) as writer:
+            for item in stream_array(StringIO('[{"a": 1}, [2, 3], "s", 4]')):
+                writer.write(item)
+            writer.write_all(i for i in range(2))
+        self.assertEqual(fp.getvalue(), '[{"a":1},[2,3],"s",4,0,1]')
+        self.assertTrue(writer.closed)
+        self.assertRaises(ValueError, writer.write, 1)
+
+    def test_empty_and_flush(self):
+        fp = BytesIO()
+        writer = StreamArrayWriter(fp)
+        writer.flush()
+        self.assertEqual(fp.getvalue(), b"[")
+        writer.close()
+        writer.close()
+        self.assertEqual(fp.getvalue(), b"[]")
+
+    def test_exception(self):
+        fp = StringIO()
+        try:
+            with StreamArrayWriter(fp) as writer:
+                writer.write(1)
+                raise KeyError()
+        except KeyError:
+            pass
+        self.assertFalse(writer.closed)
+        self.assertEqual(fp.getvalue(), "")